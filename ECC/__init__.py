@@ -5,5 +5,12 @@ __all__ = [
         "pollard_lambda",
         "pohlig_hellman",
         "baby_step",
-        "mov_attack"
+        "interleaved_step",
+        "mov_attack",
+        "tables",
+        "point_array",
+        "table_lookup",
+        "checkpoint",
+        "multi_rho",
+        "gaudry_schost"
         ]
@@ -27,15 +27,125 @@ if not __package__:
     sys.path.append('../')
 
 import math
+import multiprocessing
+import queue
 import time
+import numpy as np
+from ECC import point_array
 from ECC.curves import *
 from ECC.solver import Solver
+from ECC.tables import CompactTable, DiskTable, SortedRuns, fingerprint
+
+############ PARALLEL WORKER #########
+
+def bsgsWorker(w, workers, G, Q, m, giants, fps, inds, barrier, stop, results, counter, batchSize):
+    """ one of several processes, it first fills its slice of the shared
+        baby-step arrays and sorts it, then once every slice is ready it
+        takes its share of the giant steps and searches all the slices """
+
+    count = 0
+    exact = G.curve.fp < (1 << 63)                                  # key fits so fingerprint is exact
+    allFps = np.frombuffer(fps, dtype = np.uint64)                  # views of the shared memory
+    allInds = np.frombuffer(inds, dtype = np.uint64)
+
+    # baby steps nG for lo <= n < hi
+    lo, hi = (m + 1) * w // workers, (m + 1) * (w + 1) // workers
+    P = mul(G, lo)                                                  # jump to the start of the slice
+    sliceFps = np.zeros(hi - lo, dtype = np.uint64)
+
+    for n in range(hi - lo):
+        sliceFps[n] = fingerprint(P.key())
+        P += G                                                      # increment to next nG
+        count += 1
+
+    order = np.argsort(sliceFps, kind = "stable")                   # sort slice into a run
+    allFps[lo:hi] = sliceFps[order]
+    allInds[lo:hi] = order + lo
+
+    barrier.wait()                                                  # every run is now written
+
+    table = SortedRuns()
+    for v in range(workers):
+        vLo, vHi = (m + 1) * v // workers, (m + 1) * (v + 1) // workers
+        table.addRun(allFps[vLo:vHi], allInds[vLo:vHi])
+
+    # giant steps Q - i.m.G for gLo <= i < gHi
+    gLo, gHi = giants * w // workers, giants * (w + 1) // workers
+    stride = mul(G, m).inverted()                                   # -m.G
+    P = Q - mul(G, gLo * m)
+    i = gLo
+
+    while i < gHi and not stop.is_set():                            # another worker may have finished
+        keys = []
+
+        for _ in range(min(batchSize, gHi - i)):                    # fill the next batch
+            keys.append(P.key())
+            P += stride
+            count += 1
+
+        for pos, n in table.lookup(keys):
+            k = n + (i + pos) * m
+
+            if exact or mul(G, k) == Q:                             # verify the fingerprint match
+                results.put(k)
+                stop.set()                                          # cancel the other workers
+                break
+
+        i += len(keys)
+
+    with counter.get_lock():
+        counter.value += count
+
 
 ############ MAIN CODE #########
 
 class BGSolver(Solver):
     """ inherits from the default solver Class """
 
+    def __init__(self, C = None, Q = None, G = None, v = True):
+        super(BGSolver, self).__init__(C, Q, G, v)
+        self.compact = False                                        # use a CompactTable not a dict
+        self.maxTableEntries = 0                                    # cap on baby steps, 0 is no cap
+        self.tableDir = None                                        # directory for an on-disk table
+        self.runEntries = 1 << 22                                   # baby steps per on-disk run
+        self.batchSize = 4096                                       # giant steps per batched lookup
+        self.cache = None                                           # TableCache to reuse tables between keys
+        self.workers = 1                                            # processes to use
+        self.lanes = 1                                              # step sequences advanced together
+
+
+    def setCompact(self, compact):
+        """ stores baby steps as fingerprints in preallocated arrays """
+        self.compact = compact
+
+    def setMaxTableEntries(self, entries):
+        """ caps the number of baby steps, taking more giant steps instead """
+        self.maxTableEntries = entries
+
+    def setOutOfCore(self, directory, runEntries = 1 << 22, batchSize = 4096):
+        """ keeps the baby steps on disk in sorted memory-mapped runs under
+            directory, giant steps are then looked up in batches,
+            None keeps the table in memory """
+        self.tableDir = directory
+        self.runEntries = runEntries
+        self.batchSize = batchSize
+
+    def setCache(self, cache):
+        """ sets the TableCache baby steps are kept in (e.g. tables.bsgsCache),
+            None to rebuild every time, as by default """
+        self.cache = cache
+
+    def setWorkers(self, workers):
+        """ sets how many processes share the baby and giant steps """
+        self.workers = workers
+
+    def setLanes(self, lanes):
+        """ splits the baby and giant steps into this many sequences which
+            are advanced together, one inversion per step of all of them,
+            for fields under 2^31 the lanes are a vectorised PointArray """
+        self.lanes = lanes
+
+
     def solve(self, order = False):
         """ baby-step giant-step uses a hash table to speed up
             finding a solution """
@@ -59,40 +169,154 @@ class BGSolver(Solver):
 
             sqrtO = int(math.ceil(math.sqrt(order)))                    # root G's order
 
-            # form hash table of nG ∀ 0 < n < sqrtO
-            babySteps = {}                                              # store hash table as dictionary
+            if self.maxTableEntries and sqrtO > self.maxTableEntries:   # rebalance to fit memory budget
+                sqrtO = self.maxTableEntries
 
-            P = self.curve.pointAtInf()                                 # get starting point
-            babySteps[str(P)] = 0                                       # initial point
+            giants = (order + sqrtO - 1) // sqrtO                       # enough giant steps to cover order
 
-            for n in range(1, sqrtO + 1):
-                P += self.G                                             # increment to next nG
-                babySteps[str(P)] = n                                   # create look up table
-                self.count += 1                                         # increment count
+            if self.workers > 1:
+                if self.tableDir is not None or self.cache is not None:
+                    print("Parallel BSGS can't use an on-disk or cached table")
+                    return False                                    # unsuccessful
 
-            # giant steps
-            for i in range(sqrtO):
-                P = self.Q - self.G * (i*sqrtO)                         # Q - i.sqrtO.G
-                self.count += 1                                         # increment count
+                return self.solveParallel(order, sqrtO, giants)
 
-                if str(P) in babySteps:                                 # if it is in out lookup table
-                    n = babySteps[str(P)]
-                    self.k = n + i*sqrtO
-                    break                                               # break out of for loop
-            else:
+            # reuse the table if this curve and base point have been seen
+            cacheKey = (self.curve.a, self.curve.b, self.curve.fp, self.G.key(), sqrtO)
+            cached = None
+
+            if self.cache is not None and self.tableDir is None:
+                cached = self.cache.get(cacheKey)
+
+            babySteps = None
+
+            try:
+                if cached is not None:
+                    babySteps, (x, y) = cached
+                    stride = Point(x, y, self.curve)                    # -sqrtO.G
+                else:
+                    # form hash table of nG ∀ 0 < n < sqrtO
+                    if self.tableDir is not None:                       # sorted runs on disk
+                        babySteps = DiskTable(sqrtO + 1, self.tableDir, self.runEntries)
+                    elif self.compact:
+                        babySteps = CompactTable(sqrtO + 1)             # fingerprints in numpy arrays
+                    else:
+                        babySteps = {}                                  # store hash table as dictionary
+
+                    if self.lanes > 1:
+                        self.babyStepLanes(babySteps, sqrtO)
+                        stride = mul(self.G, sqrtO).inverted()          # -sqrtO.G
+                    else:
+                        P = self.curve.pointAtInf()                     # get starting point
+                        self.store(babySteps, P, 0)                     # initial point
+
+                        for n in range(1, sqrtO + 1):
+                            P += self.G                                 # increment to next nG
+                            self.store(babySteps, P, n)                 # create look up table
+                            self.count += 1                             # increment count
+
+                        # giant steps, each one is a single addition of the stride
+                        stride = P.inverted()                           # last baby step is sqrtO.G
+
+                    if self.cache is not None and self.tableDir is None and not stride.inf:
+                        self.cache.put(cacheKey, (babySteps, (stride.x, stride.y)))
+
+                if isinstance(babySteps, DiskTable):
+                    babySteps.flush()                                   # write out the final run
+                    k = self.giantStepsBatched(babySteps, stride, sqrtO, giants)
+                elif self.lanes > 1:
+                    k = self.giantStepLanes(babySteps, stride, sqrtO, giants, order)
+                else:
+                    k = self.giantSteps(babySteps, stride, sqrtO, giants)
+            finally:
+                if isinstance(babySteps, DiskTable):                    # even if interrupted
+                    babySteps.close()                                   # remove from disk
+
+            if k is None:
                 # sanity check
                 if self.verbose:
                     print ("Point not found")
 
                 return 0
 
+            self.k = k
+
+        self.time = time.time() - self.start
+
+        # set space, the table plus the stride point
+        self.space = len(babySteps) * 2 + 2
+
+        if self.verbose:
+            print("k:", self.k)
+            print("Time taken: %.3f s" % (self.time))               # print time taken
+            print("Space used: %d" % (self.space))                  # print space used
+            print("Numbers checked:", self.count)                   # print total count
+
+        return True
+
+
+    def solveParallel(self, order, m, giants):
+        """ splits the baby steps into one sorted slice per worker in shared
+            memory, then splits the giant steps between the same workers,
+            the first worker to find k stops the rest, the slices are
+            always fingerprints so the table is compact whatever is set,
+            a worker that crashes stops the others and raises an error """
+
+        fps = multiprocessing.RawArray("Q", m + 1)                  # shared baby-step fingerprints
+        inds = multiprocessing.RawArray("Q", m + 1)                 # and the n they came from
+        barrier = multiprocessing.Barrier(self.workers)
+        stop = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        counter = multiprocessing.Value("q", 0)
+
+        procs = [multiprocessing.Process(target = bsgsWorker,
+                                         args = (w, self.workers, self.G, self.Q, m, giants, fps, inds,
+                                                 barrier, stop, results, counter, self.batchSize))
+                 for w in range(self.workers)]
+
+        for proc in procs:
+            proc.start()
+
+        k = None
+        while k is None and any(proc.is_alive() for proc in procs):
+            try:
+                k = results.get(timeout = 0.1)                      # wait for any worker to find k
+            except queue.Empty:
+                crashed = [proc for proc in procs if proc.exitcode]
+
+                if crashed:                                         # the others may wait at the barrier
+                    stop.set()
+                    barrier.abort()
+
+                    for proc in procs:
+                        proc.join()
+
+                    raise RuntimeError("BSGS worker exited with code %d" % crashed[0].exitcode)
+
+        if k is None and not results.empty():                       # found as the last worker exited
+            k = results.get()
+
+        stop.set()
+        for proc in procs:
+            proc.join()
+
+        self.count += counter.value
         self.time = time.time() - self.start
 
-        # set space
-        self.space = len(babySteps) * 2
+        if k is None:
+            if self.verbose:
+                print ("Point not found")
+
+            return 0
+
+        self.k = k % order
+
+        # set space, the shared table plus a stride point per worker
+        self.space = (m + 1) * 2 + 2 * self.workers
 
         if self.verbose:
             print("k:", self.k)
+            print("Workers:", self.workers)
             print("Time taken: %.3f s" % (self.time))               # print time taken
             print("Space used: %d" % (self.space))                  # print space used
             print("Numbers checked:", self.count)                   # print total count
@@ -100,6 +324,145 @@ class BGSolver(Solver):
         return True
 
 
+    def store(self, table, P, n):
+        """ records that P = nG in the baby-step table """
+        self.storeKey(table, P.key(), n)
+
+
+    def storeKey(self, table, key, n):
+        """ records that the point with this key is nG in the baby-step table """
+
+        if isinstance(table, dict):
+            table[key] = n
+        else:
+            table.insert(key, n)
+
+
+    def verify(self, k):
+        """ checks a fingerprint match, only needed if fingerprints
+            can collide, i.e. the point key doesn't fit in 64 bits """
+        return self.curve.fp < (1 << 63) or mul(self.G, k) == self.Q
+
+
+    def giantSteps(self, table, stride, m, giants):
+        """ walks Q - i.m.G one step at a time, returning k or None """
+
+        P = self.Q                                                  # Q - 0.m.G
+
+        for i in range(giants):
+            if i:
+                P += stride                                         # Q - i.m.G
+            self.count += 1                                         # increment count
+
+            if isinstance(table, dict):
+                n = table.get(P.key())                              # compact key, no string formatting
+
+                if n is not None:                                   # if it is in out lookup table
+                    return n + i*m
+            else:
+                for n in table.get(P.key()):                        # normally at most one candidate
+                    if self.verify(n + i*m):
+                        return n + i*m
+
+        return None
+
+
+    def babyStepLanes(self, table, m):
+        """ stores nG for 0 <= n <= m, split into lanes of consecutive
+            baby steps, each round adds G to the end of every lane using
+            batchAdd, so a round costs a single inversion """
+
+        span = (m + self.lanes) // self.lanes                       # baby steps per lane
+        starts = list(range(0, m + 1, span))
+        points = [mul(self.G, n) for n in starts]                   # first point of each lane
+        vector = point_array.supported(self.curve, len(points))
+
+        if vector:
+            points = point_array.fromPoints(points)
+
+        for j in range(span):
+            if starts[-1] + j > m:                                  # the last lane can be shorter
+                starts.pop()
+                points = points[:-1]
+
+            keys = points.keys().tolist() if vector else [P.key() for P in points]
+
+            for n, key in zip(starts, keys):
+                self.storeKey(table, key, n + j)
+
+            if j < span - 1:
+                if vector:
+                    points = points + self.G                        # increment every lane
+                else:
+                    points = batchAdd(points, [self.G] * len(points))
+
+                self.count += len(points)                           # increment count
+
+
+    def giantStepLanes(self, table, stride, m, giants, order):
+        """ walks Q - i.m.G split into lanes of consecutive giant steps,
+            a round checks the end of every lane then adds the stride to
+            all of them with a single inversion, returning k or None """
+
+        span = (giants + self.lanes - 1) // self.lanes              # giant steps per lane
+        starts = list(range(0, giants, span))
+        points = [self.Q - mul(self.G, i * m) for i in starts]      # Q - i.m.G starting each lane
+        vector = point_array.supported(self.curve, len(points))
+
+        if vector:
+            points = point_array.fromPoints(points)
+
+        for j in range(span):
+            if starts[-1] + j >= giants:                            # the last lane can be shorter
+                starts.pop()
+                points = points[:-1]
+
+            keys = points.keys().tolist() if vector else [P.key() for P in points]
+
+            for i, key in zip(starts, keys):
+                self.count += 1                                     # increment count
+
+                if isinstance(table, dict):
+                    candidates = [table[key]] if key in table else []
+                else:
+                    candidates = table.get(key)                     # normally at most one candidate
+
+                for n in candidates:
+                    if self.verify(n + (i + j)*m):
+                        return (n + (i + j)*m) % order              # lanes don't find the smallest
+
+            if vector:
+                points = points + stride                            # Q - (i + j + 1).m.G
+            else:
+                points = batchAdd(points, [stride] * len(points))
+
+        return None
+
+
+    def giantStepsBatched(self, table, stride, m, giants):
+        """ walks Q - i.m.G collecting a batch of keys at a time, which
+            are then binary searched in every sorted run together """
+
+        P = self.Q                                                  # Q - 0.m.G
+        i = 0
+
+        while i < giants:
+            keys = []
+
+            for _ in range(min(self.batchSize, giants - i)):        # fill the next batch
+                keys.append(P.key())
+                P += stride                                         # Q - (i + 1).m.G
+                self.count += 1                                     # increment count
+
+            for pos, n in table.lookup(keys):                       # sorted by position in batch
+                if self.verify(n + (i + pos)*m):
+                    return n + (i + pos)*m
+
+            i += len(keys)
+
+        return None
+
+
 ############ COMMAND LINE INTERFACE #########
 
 if __name__ == '__main__':
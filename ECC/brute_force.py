@@ -49,8 +49,11 @@ class BFSolver(Solver):
         self.count = 1                                              # initial count
         P = self.G                                                  # copy point
 
+        if self.jacobian:
+            P = P.toJacobian()                                      # mixed additions need no inverse
+
         # loop through all numbers looking for candidate until infinity
-        while P != self.Q and P != self.curve.pointAtInf():
+        while P != self.Q and not P.inf:
             P += self.G                                             # add another G
             self.count += 1                                         # increment count
 
@@ -0,0 +1,95 @@
+#
+#    File: checkpoint.py
+#    Author: Alexander Craig
+#    Project: An Analysis of the Security of RSA & Elliptic Curve Cryptography
+#    Supervisor: Maximilien Gadouleau
+#    Version: 1.0
+#    Date: 18/10/26
+#
+#    Functionality: periodically saves the state of a long running solver to
+#                   disk, so a run that is stopped (e.g. by a job scheduler)
+#                   can be resumed where it left off
+#
+#    Instructions: intended use is to import this file as a module and to
+#                  use the class and functions as defined
+#
+#    Notes: a state is any picklable object, the solvers only keep integers
+#           (coefficients of points rather than the points themselves) so
+#           saving is cheap, it is written to a temporary file then renamed
+#           so a half written checkpoint is never read
+#
+
+############ IMPORTS #########
+
+# needed for pydocs to correctly find everything
+import sys
+sys.path.append('Programming/')
+
+# allows me to run this file directly, i.e. not wrapped up in the package
+if not __package__:
+    sys.path.append('../')
+
+import os
+import pickle
+import time
+
+
+############ GLOBAL CONSTANTS #########
+
+CHECK_EVERY = 1 << 10                                                   # steps between looking at the clock
+
+
+############ EXTRA FUNCTIONS #########
+
+def problemName(name, curve, G, Q):
+    """ the file name of a solver's checkpoint for one problem, so a state
+        is only ever resumed on the key it was saved for """
+    return "%s_%d_%d_%d_%d_%d.pkl" % (name, curve.a, curve.b, curve.fp, G.key(), Q.key())
+
+
+############ CHECKPOINT CLASS #########
+
+class Checkpoint:
+    """ a file a solver's state is saved to at most once every interval
+        seconds, and loaded from when resuming """
+
+    def __init__(self, path, interval = 60):
+        self.path = path                                                # where the state is kept
+        self.interval = interval                                        # seconds between saves
+        self.last = time.time()                                         # time of the last save
+
+
+    def due(self):
+        """ whether interval seconds have passed since the last save """
+        return time.time() - self.last >= self.interval
+
+
+    def save(self, state):
+        """ writes the state, replacing any older one """
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+
+        with open(self.path + ".tmp", "wb") as f:                       # write then rename so a
+            pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)              # half written file is never read
+
+        os.replace(self.path + ".tmp", self.path)
+        self.last = time.time()
+
+
+    def load(self):
+        """ returns the saved state, or None if there isn't one """
+
+        if not os.path.exists(self.path):
+            return None
+
+        with open(self.path, "rb") as f:
+            return pickle.load(f)
+
+
+    def clear(self):
+        """ removes the saved state once it's no longer needed """
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -30,6 +30,7 @@ sys.path.append('Programming/')
 if not __package__:
     sys.path.append('../')
 
+from collections import OrderedDict
 from cypari import pari
 from utils import helper
 
@@ -109,6 +110,8 @@ class Point:
 
         if point is None:
             return False
+        elif isinstance(point, JacobianPoint):                          # compare without converting
+            return point == self
         elif self.inf or point.inf:                                     # if one of the points is infinity
             return self.inf == point.inf                                # return if both are infinity
         else:
@@ -124,6 +127,9 @@ class Point:
             print ("Points must be defined over the same field")
             return 0
 
+        if isinstance(point, JacobianPoint):                            # mixed addition stays Jacobian
+            return point + self
+
         # checks if either are infinity
         if self.inf:
             return point
@@ -157,26 +163,24 @@ class Point:
 
 
     def __mul__(self, k):
-        """ defines multiplication via repeated squares """
+        """ defines multiplication using the scalar multiplication engine """
+        return mul(self, k)
 
-        # sanity check
-        if self.inf or k % self.curve.order(self) == 0:
-            return self.curve.pointAtInf()                              # return point at infinity
 
-        # repeated squares algorith
-        Q = self.curve.pointAtInf()                                     # copy to Q
-        G = self
+    def __hash__(self):
+        """ hashes the compact key so points can be used in sets and dictionaries """
+        return hash(self.key())
 
-        while k > 0:                                                    # continue while k is greater than 0
 
-            if k % 2 == 1:                                              # if k is odd
-                k -= 1
-                Q = G + Q                                               # add a single G to Q
-            else:
-                k //= 2
-                G += G                                                  # double G
+    def key(self):
+        """ compact canonical key for the point, the x coordinate with the
+            parity of y as the lowest bit, y and -y always differ in parity
+            as the field is odd, infinity is -1 """
 
-        return Q
+        if self.inf:
+            return -1
+        else:
+            return (self.x << 1) | (self.y & 1)
 
 
     def __str__(self):
@@ -197,6 +201,194 @@ class Point:
             return Point(self.x, (-self.y) % self.curve.fp, self.curve) # invert over field
 
 
+    def toJacobian(self):
+        """ returns the same point in Jacobian coordinates (X, Y, Z) """
+
+        if self.inf:
+            return JacobianPoint(1, 1, 0, self.curve)                   # Z = 0 represents infinity
+        else:
+            return JacobianPoint(self.x, self.y, 1, self.curve)         # affine point has Z = 1
+
+
+############ JACOBIAN POINT CLASS #########
+
+class JacobianPoint:
+    """ stores a point in Jacobian coordinates, (X, Y, Z) represents the
+        affine point (X/Z^2, Y/Z^3), this allows addition and doubling to
+        be performed without any modular inverses, which are only needed
+        when converting back to an affine Point """
+
+    def __init__(self, X, Y, Z, curve):
+        self.X = X                                                      # set Jacobian X
+        self.Y = Y                                                      # set Jacobian Y
+        self.Z = Z                                                      # set Jacobian Z
+        self.curve = curve                                              # set curve point belongs to
+        self.inf = Z == 0                                               # Z = 0 is the point at infinity
+
+
+    ############ COMPUTATION FUNCTIONS #########
+
+    def __eq__(self, point):
+        """ given a second point (Jacobian or affine) returns if equal or not,
+            by cross multiplying rather than converting to affine """
+
+        if point is None:
+            return False
+
+        if isinstance(point, Point):
+            point = point.toJacobian()                                  # affine point has Z = 1
+
+        if self.inf or point.inf:                                       # if one of the points is infinity
+            return self.inf == point.inf                                # return if both are infinity
+
+        fp = self.curve.fp
+        Z1Z1 = (self.Z * self.Z) % fp
+        Z2Z2 = (point.Z * point.Z) % fp
+
+        return ((self.X * Z2Z2 - point.X * Z1Z1) % fp == 0 and          # X1.Z2^2 == X2.Z1^2
+                (self.Y * Z2Z2 * point.Z - point.Y * Z1Z1 * self.Z) % fp == 0)
+
+
+    def __add__(self, point):
+        """ given a second point returns the addition of the two,
+            if the second point is affine a cheaper mixed addition is used """
+
+        # sanity check
+        if self.curve.fp != point.curve.fp:
+            print ("Points must be defined over the same field")
+            return 0
+
+        # checks if either are infinity
+        if point.inf:
+            return self
+
+        if isinstance(point, Point):                                    # mixed Jacobian + affine case
+            if self.inf:
+                return point.toJacobian()
+
+            return self.addAffine(point)
+
+        if self.inf:
+            return point
+
+        fp = self.curve.fp
+        Z1Z1 = (self.Z * self.Z) % fp
+        Z2Z2 = (point.Z * point.Z) % fp
+        U1 = (self.X * Z2Z2) % fp                                       # X1.Z2^2
+        U2 = (point.X * Z1Z1) % fp                                      # X2.Z1^2
+        S1 = (self.Y * point.Z * Z2Z2) % fp                             # Y1.Z2^3
+        S2 = (point.Y * self.Z * Z1Z1) % fp                             # Y2.Z1^3
+
+        # if x have same coord
+        if U1 == U2:
+            if S1 == S2:                                                # point doubling case
+                return self.double()
+            else:                                                       # self.y == - point.y
+                return JacobianPoint(1, 1, 0, self.curve)               # return point at infinity
+
+        H = (U2 - U1) % fp
+        R = (S2 - S1) % fp
+        HH = (H * H) % fp
+        HHH = (H * HH) % fp
+        V = (U1 * HH) % fp
+
+        X3 = (R * R - HHH - 2 * V) % fp                                 # compute new X coord
+        Y3 = (R * (V - X3) - S1 * HHH) % fp                             # compute new Y coord
+        Z3 = (H * self.Z * point.Z) % fp                                # compute new Z coord
+
+        return JacobianPoint(X3, Y3, Z3, self.curve)
+
+
+    def addAffine(self, point):
+        """ mixed addition of an affine point with Z = 1 to this point """
+
+        fp = self.curve.fp
+        Z1Z1 = (self.Z * self.Z) % fp
+        U2 = (point.x * Z1Z1) % fp                                      # x2.Z1^2
+        S2 = (point.y * self.Z * Z1Z1) % fp                             # y2.Z1^3
+
+        # if x have same coord
+        if U2 == self.X:
+            if S2 == self.Y:                                            # point doubling case
+                return self.double()
+            else:                                                       # self.y == - point.y
+                return JacobianPoint(1, 1, 0, self.curve)               # return point at infinity
+
+        H = (U2 - self.X) % fp
+        R = (S2 - self.Y) % fp
+        HH = (H * H) % fp
+        HHH = (H * HH) % fp
+        V = (self.X * HH) % fp
+
+        X3 = (R * R - HHH - 2 * V) % fp                                 # compute new X coord
+        Y3 = (R * (V - X3) - self.Y * HHH) % fp                         # compute new Y coord
+        Z3 = (H * self.Z) % fp                                          # compute new Z coord
+
+        return JacobianPoint(X3, Y3, Z3, self.curve)
+
+
+    def double(self):
+        """ returns the point added to itself """
+
+        if self.inf or self.Y == 0:                                     # vertical tangent
+            return JacobianPoint(1, 1, 0, self.curve)                   # return point at infinity
+
+        fp = self.curve.fp
+        YY = (self.Y * self.Y) % fp
+        ZZ = (self.Z * self.Z) % fp
+        S = (4 * self.X * YY) % fp                                      # 4.X.Y^2
+        M = (3 * self.X * self.X + self.curve.a * ZZ * ZZ) % fp         # 3X^2 + a.Z^4
+
+        X3 = (M * M - 2 * S) % fp                                       # compute new X coord
+        Y3 = (M * (S - X3) - 8 * YY * YY) % fp                          # compute new Y coord
+        Z3 = (2 * self.Y * self.Z) % fp                                 # compute new Z coord
+
+        return JacobianPoint(X3, Y3, Z3, self.curve)
+
+
+    def __sub__(self, point):
+        """ given a second point returns the subtracton of the two """
+        return self + point.inverted()                                  # simply add the inverted point
+
+
+    def inverted(self):
+        """ returns the inverted point """
+
+        if self.inf:
+            return self                                                 # simple case of base point
+        else:
+            return JacobianPoint(self.X, (-self.Y) % self.curve.fp,     # invert over field
+                                 self.Z, self.curve)
+
+
+    def toAffine(self):
+        """ converts back to an affine Point, needing a single modular inverse """
+
+        if self.inf:
+            return self.curve.pointAtInf()
+
+        fp = self.curve.fp
+        zInv = helper.modInverse(self.Z, fp)                            # the only inverse needed
+        zInv2 = (zInv * zInv) % fp
+
+        return Point((self.X * zInv2) % fp, (self.Y * zInv2 * zInv) % fp, self.curve)
+
+
+    def __hash__(self):
+        """ hashes the affine key so equal points hash equally """
+        return hash(self.key())
+
+
+    def key(self):
+        """ compact canonical key of the affine point """
+        return self.toAffine().key()
+
+
+    def __str__(self):
+        """ defines how it should be printed, as the affine point """
+        return str(self.toAffine())
+
+
 ############ CURVE CLASS #########
 
 class Curve:
@@ -214,6 +406,11 @@ class Curve:
         self.E = None                                                   # pari version of curve
         self.discriminant = 0                                           # discriminant of curve
         self.card = 0                                                   # cardinality of the curve
+        self.orderCache = OrderedDict()                                 # LRU of point -> [order, factors]
+        self.orderCacheSize = 1024                                      # max points remembered
+        self.combWidth = 4                                              # window width of fixed-base tables
+        self.baseTables = {}                                            # point -> FixedBaseTable
+        self.automorphisms = OrderedDict()                              # LRU of point -> Automorphism or None
         self.initPari()                                                 # initialise pari curve
 
 
@@ -239,6 +436,32 @@ class Curve:
         """ sets pari curve """
         self.E = E
 
+    def setOrderCacheSize(self, size):
+        """ sets how many point orders are remembered """
+        self.orderCacheSize = size
+
+    def setCombWidth(self, w):
+        """ sets the window width of fixed-base tables, a table uses
+            (bits / w) * (2^w - 1) points, 0 turns them off """
+        self.combWidth = w
+        self.baseTables = {}                                            # rebuild at the new width
+
+
+    ############ PICKLING #########
+
+    def __getstate__(self):
+        """ the pari curve can't be pickled, so it is left behind when a
+            curve is sent to another process, cached orders are kept """
+
+        state = self.__dict__.copy()
+        state["E"] = None                                               # Pari is not needed by workers
+        state["baseTables"] = {}                                        # rebuilt lazily if needed
+        return state
+
+    def __setstate__(self, state):
+        """ restores a pickled curve """
+        self.__dict__.update(state)
+
 
     ############ COMPUTATION FUNCTIONS #########
 
@@ -279,6 +502,83 @@ class Curve:
             pass
 
 
+    def precompute(self, point):
+        """ builds (or returns the existing) fixed-base table for a point """
+
+        if not self.combWidth or point.inf:
+            return None
+
+        key = point.key()
+
+        if key not in self.baseTables:
+            orderP = self.cachedOrder(point)
+            bits = orderP.bit_length() if orderP else self.fp.bit_length() + 1  # Hasse bound: order < 2p
+
+            self.baseTables[key] = FixedBaseTable(point, bits, self.combWidth)
+
+        return self.baseTables[key]
+
+
+    def baseTable(self, point):
+        """ returns the fixed-base table for a point if it has one, the
+            generator's table is built lazily the first time it is needed """
+
+        if not self.combWidth or point.inf:
+            return None
+
+        table = self.baseTables.get(point.key())
+
+        if table is None and point == self.G:                           # lazily build for G
+            table = self.precompute(point)
+
+        return table
+
+
+    def automorphismOrder(self):
+        """ size of the automorphism group over Fp, 6 for j = 0 curves
+            (a = 0, p = 1 mod 3), 4 for j = 1728 curves (b = 0, p = 1 mod 4),
+            otherwise 2 as every curve has the negation map """
+
+        a, b = self.a % self.fp, self.b % self.fp
+
+        if a == 0 and b and self.fp % 3 == 1:
+            return 6
+        elif b == 0 and a and self.fp % 4 == 1:
+            return 4
+        else:
+            return 2
+
+
+    def automorphism(self, point, order = 0):
+        """ returns the automorphism acting on the subgroup generated by the
+            point as multiplication by an eigenvalue, or None if the curve has
+            none or the order of the point isn't known yet, results are kept
+            in a bounded LRU cache, the same size as the order cache """
+
+        if point.inf or self.automorphismOrder() == 2:
+            return None
+
+        key = point.key()
+
+        if key in self.automorphisms:
+            self.automorphisms.move_to_end(key)                         # mark as recently used
+            return self.automorphisms[key]
+
+        cached = self.cachedOrder(point)
+        n = order or cached
+
+        if not n:                                                       # try again once the order is known
+            return None
+
+        factors = self.factorOrder(point) if n == cached else None      # factorised at most once per point
+        self.automorphisms[key] = findAutomorphism(point, n, factors = factors)
+
+        if len(self.automorphisms) > self.orderCacheSize:               # evict least recently used
+            self.automorphisms.popitem(last = False)
+
+        return self.automorphisms[key]
+
+
     def pointAtInf(self):
         """ defines the point at infinity for the curve """
 
@@ -306,19 +606,66 @@ class Curve:
 
 
     def order(self, point):
-        """ gives the order of a point on the curve """
+        """ gives the order of a point on the curve, results are kept
+            in a bounded LRU cache so Pari is only asked once per point """
+
+        # check point is on curve first, so only valid points are cached
+        if not self.onCurve(point):
+            return 0
 
-        # check point is on curve first
-        # and pari curve exists
-        if not self.onCurve(point) or self.E is None:
+        if point.inf:
+            return 1
+
+        key = point.key()
+
+        if key in self.orderCache:                                      # already seen this point
+            self.orderCache.move_to_end(key)                            # mark as recently used
+            return self.orderCache[key][0]
+
+        if self.E is None:                                              # no pari curve, e.g. in a worker
             return 0
 
         P = "[" + str(point.x) + "," + str(point.y) + "]"               # string representation of point
 
         # finds order using Schoof-Elkies-Atkin algorithm
-        orderP = pari(self.E).ellorder(P)                               # use Pari to calculate order
+        orderP = int(pari(self.E).ellorder(P))                          # use Pari to calculate order
+
+        self.orderCache[key] = [orderP, None]                           # factorise lazily
+
+        if len(self.orderCache) > self.orderCacheSize:                  # evict least recently used
+            self.orderCache.popitem(last = False)
+
+        return orderP
+
+
+    def cachedOrder(self, point):
+        """ returns the order of a point if it has already been calculated
+            else 0, never calls Pari """
+
+        if point.inf:
+            return 1
+
+        entry = self.orderCache.get(point.key())
+
+        return entry[0] if entry else 0
+
+
+    def factorOrder(self, point):
+        """ returns the prime factorisation of a point's order as a
+            dictionary of prime -> power, cached alongside the order """
 
-        return int(orderP)
+        orderP = self.order(point)
+
+        if orderP == 0:
+            return {}
+
+        entry = self.orderCache[point.key()]
+
+        if entry[1] is None:                                            # not yet factorised
+            f = pari("factor(" + str(orderP) + ")")                     # use Pari to factorise
+            entry[1] = {int(f[i, 0]): int(f[i, 1]) for i in range(int(f.matsize()[0]))}
+
+        return entry[1]
 
 
     def getG(self):
@@ -409,3 +756,580 @@ class Curve:
         eq += " % " + str(self.fp)
 
         return eq
+
+
+############ FIXED-BASE TABLE CLASS #########
+
+class FixedBaseTable:
+    """ windowed fixed-base precomputation for a point P, row i holds
+        j.2^(w.i).P for 0 < j < 2^w, so kP for any k < 2^bits is the sum of
+        one entry per row, needing at most bits / w additions and no doublings """
+
+    def __init__(self, P, bits, w):
+        self.P = P                                                      # base point
+        self.w = w                                                      # window width
+        self.bits = bits                                                # largest scalar supported
+        self.mask = (1 << w) - 1                                        # extracts a window
+        self.rows = []                                                  # affine table
+
+        J = P.toJacobian()
+        jacobian = []
+
+        for _ in range((bits + w - 1) // w):
+            row = [J]
+
+            for _ in range(self.mask - 1):                              # J, 2J, ..., (2^w - 1)J
+                row.append(row[-1] + J)
+
+            jacobian.append(row)
+            J = row[-1] + J                                             # 2^w.J starts the next row
+
+        flat = normalise([Q for row in jacobian for Q in row])          # single inverse for the table
+
+        for i in range(len(jacobian)):
+            self.rows.append(flat[i * self.mask:(i + 1) * self.mask])
+
+
+    def __len__(self):
+        """ number of points stored """
+        return len(self.rows) * self.mask
+
+
+    def mul(self, k, counts = None):
+        """ returns kP for 0 <= k < 2^bits """
+
+        R = self.P.curve.pointAtInf().toJacobian()
+        adds = 0
+
+        for row in self.rows:
+            d = k & self.mask                                           # next window of k
+
+            if d:
+                R = R + row[d - 1]                                      # mixed addition
+                adds += 1
+
+            k >>= self.w
+
+        if counts is not None:
+            counts["add"] += adds
+
+        return R.toAffine()
+
+
+############ AUTOMORPHISM CLASS #########
+
+class Automorphism:
+    """ the automorphism psi of a j = 0 curve, (x, y) -> (zeta.x, y) with
+        zeta a cube root of unity, or of a j = 1728 curve, (x, y) -> (-x, zeta.y)
+        with zeta a square root of -1, on a subgroup of order n it acts as
+        multiplication by lam, a root of x^2 + x + 1 or x^2 + 1 mod n """
+
+    def __init__(self, curve, zeta, lam, n):
+        self.curve = curve                                              # curve it is defined on
+        self.zeta = zeta                                                # root of unity in Fp
+        self.lam = lam                                                  # psi(P) = lam.P
+        self.n = n                                                      # order of the subgroup
+        self.j0 = curve.automorphismOrder() == 6                        # else j = 1728
+        self.half = curve.fp // 2                                       # y above this is negated
+        self.lamPowers = [1, lam, (lam * lam) % n]                      # psi^i(P) = lam^i.P
+        self.basis = glvBasis(n, lam)                                   # short vectors for GLV
+
+
+    def apply(self, P):
+        """ returns psi(P), costing one field multiplication """
+
+        if P.inf:
+            return P
+
+        fp = self.curve.fp
+
+        if self.j0:
+            return Point((self.zeta * P.x) % fp, P.y, self.curve)
+        else:
+            return Point((-P.x) % fp, (self.zeta * P.y) % fp, self.curve)
+
+
+    def canonical(self, P):
+        """ returns the representative of the class {+-psi^i(P)} with the
+            smallest x then the smaller y, and u with representative = u.P """
+
+        fp = self.curve.fp
+        x, y, u = P.x, P.y, 1
+
+        if self.j0:                                                     # x, zeta.x, zeta^2.x
+            x1 = (self.zeta * x) % fp
+            x2 = (self.zeta * x1) % fp
+
+            if x1 < x and x1 < x2:
+                x, u = x1, self.lam
+            elif x2 < x:
+                x, u = x2, self.lamPowers[2]
+
+        elif fp - x < x:                                                # x or -x
+            x, y, u = fp - x, (self.zeta * y) % fp, self.lam
+
+        if y > self.half:                                               # negation map
+            y, u = fp - y, -u
+
+        if u == 1:
+            return P, 1
+
+        return Point(x, y, self.curve), u % self.n
+
+
+    def decompose(self, k):
+        """ splits k into k1 + k2.lam mod n with k1 and k2 about sqrt(n) """
+
+        (a1, b1), (a2, b2) = self.basis
+        det = a1 * b2 - a2 * b1                                         # +-n, the lattice's volume
+        c1 = roundDiv(b2 * k, det)
+        c2 = roundDiv(-b1 * k, det)
+
+        return k - c1 * a1 - c2 * a2, -c1 * b1 - c2 * b2
+
+
+    def mul(self, P, k, w = None, counts = None):
+        """ returns kP = k1.P + k2.psi(P) using a multi-scalar multiplication
+            with half length scalars (GLV) """
+
+        k1, k2 = self.decompose(k)
+        P1, P2 = P, self.apply(P)
+
+        if k1 < 0:                                                      # keep scalars positive so
+            P1, k1 = P1.inverted(), -k1                                 # they aren't reduced mod n
+
+        if k2 < 0:
+            P2, k2 = P2.inverted(), -k2
+
+        return mulMulti([P1, P2], [k1, k2], w, counts, False)
+
+
+def roundDiv(a, n):
+    """ a / n rounded to the nearest integer """
+
+    if n < 0:
+        a, n = -a, -n
+
+    return (2 * a + n) // (2 * n)
+
+
+def glvBasis(n, lam):
+    """ two short vectors (a, b) with a + b.lam = 0 mod n, found with the
+        extended Euclidean algorithm on n and lam stopped near sqrt(n) """
+
+    r0, r1 = n, lam
+    t0, t1 = 0, 1
+
+    while r1 * r1 >= n:                                                 # r1 is at least sqrt(n)
+        q = r0 // r1
+        r0, r1 = r1, r0 - q * r1
+        t0, t1 = t1, t0 - q * t1
+
+    v1 = (r1, -t1)
+    v2 = (r0, -t0)
+
+    if r1:                                                              # next remainder may be shorter
+        q = r0 // r1
+        r2, t2 = r0 - q * r1, t0 - q * t1
+
+        if r2 * r2 + t2 * t2 < r0 * r0 + t0 * t0:
+            v2 = (r2, -t2)
+
+    return v1, v2
+
+
+def quadraticRoots(c1, c0, q, e):
+    """ roots of x^2 + c1.x + c0 modulo q^e, found modulo the prime q using
+        Pari and lifted with Hensel's lemma """
+
+    qe = pow(q, e)
+    roots = []
+
+    for r in pari("polrootsmod(x^2 + " + str(c1) + "*x + " + str(c0) + ", " + str(q) + ")"):
+        r = int(r.lift())
+
+        if (2 * r + c1) % q == 0:                                       # repeated root, can't be lifted
+            if e == 1:
+                roots.append(r)
+            continue
+
+        while (r * r + c1 * r + c0) % qe:                               # Newton's method mod q^e
+            r = (r - (r * r + c1 * r + c0) * helper.modInverse((2 * r + c1) % qe, qe)) % qe
+
+        roots.append(r)
+
+    return roots
+
+
+def findAutomorphism(P, n, maxCandidates = 64, factors = None):
+    """ finds psi for the curve of P and the eigenvalue it has on the
+        subgroup generated by P, of order n, or None if there isn't one,
+        factors is n's factorisation as prime -> power if already known """
+
+    curve = P.curve
+    fp = curve.fp
+    j0 = curve.automorphismOrder() == 6
+    m = 3 if j0 else 4
+
+    g = 2                                                               # zeta = g^((p - 1) / m)
+    while True:
+        zeta = pow(g, (fp - 1) // m, fp)
+
+        if (j0 and zeta != 1) or (not j0 and (zeta * zeta) % fp == fp - 1):
+            break
+
+        g += 1
+
+    c1 = 1 if j0 else 0                                                 # x^2 + x + 1 or x^2 + 1
+    candidates, mod = [0], 1
+
+    if factors is None:
+        f = pari("factor(" + str(n) + ")")
+        factors = {int(f[i, 0]): int(f[i, 1]) for i in range(int(f.matsize()[0]))}
+
+    for q, e in factors.items():                                        # combine roots mod q^e with the CRT
+        qe = pow(q, e)
+        roots = quadraticRoots(c1, 1, q, e)
+        inv = helper.modInverse(mod % qe, qe)
+
+        candidates = [c + mod * (((r - c) * inv) % qe) for c in candidates for r in roots]
+        mod *= qe
+
+        if not candidates or len(candidates) > maxCandidates:
+            return None
+
+    psi = Automorphism(curve, zeta, 1, n)
+    image = psi.apply(P)
+
+    for lam in candidates:
+        if mul(P, lam, "wnaf") == image:                                # the eigenvalue for this subgroup
+            return Automorphism(curve, zeta, lam, n)
+
+    return None
+
+
+############ SCALAR MULTIPLICATION #########
+
+MUL_METHODS = ["binary", "naf", "wnaf", "sliding", "fixed", "glv"]
+
+
+def windowSize(bits):
+    """ picks a sensible window width for a scalar of the given bit length,
+        balancing precomputation against additions in the main loop """
+
+    if bits <= 20:
+        return 2
+    elif bits <= 60:
+        return 3
+    elif bits <= 180:
+        return 4
+    else:
+        return 5
+
+
+def wnaf(k, w):
+    """ returns the width-w non-adjacent form of k as a list of digits,
+        least significant first, every non-zero digit is odd and
+        less than 2^(w-1) in absolute value """
+
+    digits = []
+    mod = 1 << w                                                        # 2^w
+    half = 1 << (w - 1)                                                 # 2^(w-1)
+
+    while k > 0:
+        if k & 1:                                                       # k is odd so emit a digit
+            d = k & (mod - 1)                                           # k mods 2^w
+            if d >= half:
+                d -= mod                                                # use signed residue
+            k -= d
+        else:
+            d = 0
+
+        digits.append(d)
+        k >>= 1
+
+    return digits
+
+
+def normalise(points):
+    """ converts a list of Jacobian points to affine Points using a single
+        modular inverse for the whole list """
+
+    if not points:
+        return []
+
+    curve = points[0].curve
+    fp = curve.fp
+    finite = [P for P in points if not P.inf]
+    zInvs = iter(helper.batchModInverse([P.Z for P in finite], fp))
+
+    affine = []
+
+    for P in points:
+        if P.inf:
+            affine.append(curve.pointAtInf())
+        else:
+            zInv = next(zInvs)
+            zInv2 = (zInv * zInv) % fp
+            affine.append(Point((P.X * zInv2) % fp, (P.Y * zInv2 * zInv) % fp, curve))
+
+    return affine
+
+
+def batchAdd(points, addends):
+    """ returns [P1 + R1, P2 + R2, ...] for two lists of affine points,
+        the slopes of all the additions share a single modular inverse
+        (Montgomery's trick), so m additions cost one inverse rather than m,
+        pairs may be equal (a doubling), inverse or include infinity """
+
+    if not points:
+        return []
+
+    curve = points[0].curve
+    fp = curve.fp
+    denominators = []
+
+    for P, R in zip(points, addends):
+        if P.inf or R.inf:
+            denominators.append(1)                                      # no slope needed
+        elif P.x != R.x:
+            denominators.append((R.x - P.x) % fp)                       # chord
+        elif P.y == R.y and P.y:
+            denominators.append((2 * P.y) % fp)                         # tangent
+        else:
+            denominators.append(1)                                      # P = -R
+
+    inverses = helper.batchModInverse(denominators, fp)
+    sums = []
+
+    for P, R, inv in zip(points, addends, inverses):
+        if P.inf:
+            sums.append(R)
+            continue
+        elif R.inf:
+            sums.append(P)
+            continue
+        elif P.x != R.x:
+            grad = ((R.y - P.y) * inv) % fp
+        elif P.y == R.y and P.y:
+            grad = ((3 * P.x * P.x + curve.a) * inv) % fp
+        else:
+            sums.append(curve.pointAtInf())
+            continue
+
+        x3 = (grad * grad - P.x - R.x) % fp
+        sums.append(Point(x3, (grad * (P.x - x3) - P.y) % fp, curve))
+
+    return sums
+
+
+def oddMultiples(P, m, counts = None):
+    """ returns the affine points P, 3P, 5P, ..., (2m - 1)P """
+
+    J = P.toJacobian()
+    P2 = J.double()                                                     # 2P used as the stride
+    table = [J]
+
+    for _ in range(m - 1):
+        table.append(table[-1] + P2)
+
+    if counts is not None:
+        counts["double"] += 1
+        counts["add"] += m - 1
+
+    return normalise(table)
+
+
+def mul(P, k, method = None, w = None, counts = None):
+    """ returns kP using the chosen method:
+            binary  - left to right double-and-add
+            naf     - non-adjacent form, (w = 2)
+            wnaf    - width-w non-adjacent form, negative digits use
+                      the nearly free inverted point
+            sliding - sliding windows over the binary expansion
+            fixed   - the curve's fixed-base table for P (built if needed)
+            glv     - k1.P + k2.psi(P) with half length scalars, on curves
+                      with an automorphism psi (j = 0 or 1728), else wnaf
+        by default the fixed-base table is used if P has one, else glv if the
+        curve has an automorphism and the order of P is known, else wnaf,
+        all intermediate points are Jacobian so only the precomputed table
+        and the result need an inverse, if counts is a dictionary the number
+        of additions and doublings used are added to it """
+
+    if counts is not None:
+        counts.setdefault("add", 0)
+        counts.setdefault("double", 0)
+
+    order = P.curve.cachedOrder(P)                                      # only reduce if order already known
+
+    if order:
+        k %= order
+
+    # sanity check
+    if P.inf or k == 0:
+        return P.curve.pointAtInf()                                     # return point at infinity
+
+    if k < 0:                                                           # (-k)P = k(-P)
+        P, k = P.inverted(), -k
+
+    if method is None or method == "fixed":
+        table = P.curve.precompute(P) if method else P.curve.baseTable(P)
+
+        if table is not None and k.bit_length() <= table.bits:
+            return table.mul(k, counts)
+
+        method = "glv" if method is None else "wnaf"                    # no usable table
+
+    if method == "glv":
+        auto = P.curve.automorphism(P)
+
+        if auto is not None:
+            return auto.mul(P, k, w, counts)
+
+        method = "wnaf"                                                 # no automorphism
+
+    if w is None:
+        w = windowSize(k.bit_length())
+
+    R = P.curve.pointAtInf().toJacobian()
+    adds, doubles = 0, 0
+
+    if method == "binary":
+        for bit in bin(k)[2:]:                                          # most significant bit first
+            R = R.double()
+            doubles += 1
+
+            if bit == "1":
+                R = R + P
+                adds += 1
+
+    elif method == "naf" or method == "wnaf":
+        if method == "naf":
+            w = 2
+
+        digits = wnaf(k, w)
+        table = oddMultiples(P, 1 << (w - 2), counts)                   # P, 3P, ..., (2^(w-1) - 1)P
+
+        for d in reversed(digits):                                      # most significant digit first
+            R = R.double()
+            doubles += 1
+
+            if d > 0:
+                R = R + table[d >> 1]
+                adds += 1
+            elif d < 0:
+                R = R + table[(-d) >> 1].inverted()                     # negation is nearly free
+                adds += 1
+
+    elif method == "sliding":
+        bits = bin(k)[2:]
+        table = oddMultiples(P, 1 << (w - 1), counts)                   # P, 3P, ..., (2^w - 1)P
+        i = 0
+
+        while i < len(bits):
+            if bits[i] == "0":
+                R = R.double()
+                doubles += 1
+                i += 1
+            else:
+                j = min(i + w, len(bits))                               # longest window starting here
+                while bits[j - 1] == "0":                               # that ends in a 1
+                    j -= 1
+
+                for _ in range(j - i):
+                    R = R.double()
+                    doubles += 1
+
+                R = R + table[int(bits[i:j], 2) >> 1]
+                adds += 1
+                i = j
+
+    else:
+        print("Unknown multiplication method: " + str(method))
+        return 0
+
+    if counts is not None:
+        counts["add"] += adds
+        counts["double"] += doubles
+
+    return R.toAffine()
+
+
+def mulMulti(points, scalars, w = None, counts = None, shortcuts = True):
+    """ returns k1P1 + k2P2 + ... + kmPm using Straus' interleaving (Shamir's
+        trick), every scalar is recoded in wNAF and all of them share a single
+        chain of doublings, points with a fixed-base table skip the chain and
+        are looked up instead, on curves with an automorphism each other point
+        with a known order is split in two with half length scalars (GLV),
+        if shortcuts is False neither is done and every point uses the chain,
+        with no points there is no curve to take infinity from so a
+        ValueError is raised """
+
+    if not points:
+        raise ValueError("mulMulti needs at least one point")
+
+    if counts is not None:
+        counts.setdefault("add", 0)
+        counts.setdefault("double", 0)
+
+    curve = points[0].curve
+    R = curve.pointAtInf().toJacobian()
+    interleaved = []                                                    # (digits, table) per point
+    adds, doubles = 0, 0
+
+    for P, k in zip(points, scalars):
+        order = curve.cachedOrder(P)                                    # only reduce if order already known
+
+        if order:
+            k %= order
+
+        if P.inf or k == 0:                                             # contributes nothing
+            continue
+
+        if k < 0:                                                       # (-k)P = k(-P)
+            P, k = P.inverted(), -k
+
+        table = curve.baseTable(P) if shortcuts else None
+
+        if table is not None and k.bit_length() <= table.bits:         # cheaper to look up
+            R = R + table.mul(k, counts)
+            adds += 1
+            continue
+
+        auto = curve.automorphism(P) if shortcuts else None
+        pairs = [(P, k)]
+
+        if auto is not None:                                            # k.P = k1.P + k2.psi(P)
+            k1, k2 = auto.decompose(k)
+            pairs = [(P, k1), (auto.apply(P), k2)]
+
+        for P, k in pairs:
+            if k < 0:
+                P, k = P.inverted(), -k
+
+            if k:
+                width = w if w is not None else windowSize(k.bit_length())
+                interleaved.append((wnaf(k, width), oddMultiples(P, 1 << (width - 2), counts)))
+
+    length = max([len(digits) for digits, _ in interleaved] + [0])
+    S = curve.pointAtInf().toJacobian()
+
+    for i in range(length - 1, -1, -1):                                 # most significant digit first
+        S = S.double()                                                  # shared doubling
+        doubles += 1
+
+        for digits, table in interleaved:
+            d = digits[i] if i < len(digits) else 0
+
+            if d > 0:
+                S = S + table[d >> 1]
+                adds += 1
+            elif d < 0:
+                S = S + table[(-d) >> 1].inverted()                     # negation is nearly free
+                adds += 1
+
+    if counts is not None:
+        counts["add"] += adds
+        counts["double"] += doubles
+
+    return (R + S).toAffine()
@@ -0,0 +1,323 @@
+#
+#    File: gaudry_schost.py
+#    Author: Alexander Craig
+#    Project: An Analysis of the Security of RSA & Elliptic Curve Cryptography
+#    Supervisor: Maximilien Gadouleau
+#    Version: 1.0
+#    Date: 18/10/26
+#
+#    Functionality: uses the Gaudry-Schost method to caclualte a private ECC
+#                   key from a given public key set, when the key is known
+#                   to lie in an interval [lo, hi]
+#
+#    Instructions: intended use is to import this file and use the Class as defined
+#
+#    Notes: the interval is shifted to [-N/2, N/2], short walks start at
+#           random points of a tame set (multiples of G in [-N/2, N/2]) and
+#           a wild set (Q plus multiples in [-N/4, N/4]) and stop at
+#           distinguished points, a tame and a wild walk reaching the same
+#           one give k, with the negation map the walks are on classes
+#           {P, -P} (Galbraith and Ruprai), so the sets overlap more and
+#           two wild walks can also give k, but as the class of P + s.G
+#           can be -(P + s.G) a walk's log goes back and forth and soon
+#           revisits a point, so these walks have to be kept very short,
+#           each start point then costs about as much as the walk from it,
+#           so they are found with a fixed-base table of multiples of G
+#           and counted
+#
+#    CLI: for testing can be used from command line -
+#           python3 gaudry_schost.py curve_a curve_b curve_fp G_x G_y Q_x Q_y [verbose]
+#           for base-point G and public-point Q
+#
+
+############ IMPORTS #########
+
+# needed for pydocs to correctly find everything
+import sys
+sys.path.append('Programming/')
+
+# allows me to run this file directly, i.e. not wrapped up in the package
+if not __package__:
+    sys.path.append('../')
+
+# to make it backwards compatable with Python < 3.6
+try:
+    import secrets
+except ImportError:
+    from utils import secrets
+
+import math
+import time
+from ECC.curves import *
+from ECC.pollard_rho import RAddingWalk, solveCollision
+from ECC.solver import Solver
+
+
+############ GLOBAL CONSTANTS #########
+
+SMALL_WIDTH = 4                                                     # narrower intervals are just checked
+START_TRIES = 64                                                    # random starts before falling back to G
+
+
+############ EXTRA FUNCTIONS #########
+
+def schostWalks(walk, dpBits, walks, starts):
+    """ keeps several short walks going at once, a step of all of them
+        costing a single inversion, and yields (key, a, b, steps) for every
+        distinguished point reached, steps being the number taken since
+        the last one, a walk then starts again at starts(), as does one
+        that goes on too long """
+
+    dpMask = (1 << dpBits) - 1
+    maxSteps = 20 << dpBits                                         # 20 times the expected walk length
+    steps = 0                                                       # steps since the last report
+
+    states = [starts() for _ in range(walks)]
+    histories = [[] for _ in range(walks)]                          # for fruitless cycles
+    lengths = [0] * walks
+
+    while True:
+        states = walk.stepMany(states, histories)
+        steps += walks
+
+        for j, (X, a, b) in enumerate(states):
+            lengths[j] += 1
+
+            if walk.distinguished(X, dpMask):
+                yield X.key(), a, b, steps
+                steps = 0
+            elif lengths[j] < maxSteps:
+                continue
+
+            states[j] = starts()                                    # a new random point of a set
+            histories[j] = []
+            lengths[j] = 0
+
+
+def startWidth(width):
+    """ window width of the fixed-base table used to find starting points,
+        the widest up to 8 whose table is at most sqrt(width) / 8 points """
+
+    bits = width.bit_length()
+    w = 2
+
+    while w < 8 and ((bits + w) // (w + 1)) * ((1 << (w + 1)) - 1) <= int(math.sqrt(width)) // 8:
+        w += 1
+
+    return w
+
+
+############ MAIN CODE #########
+
+class GSSolver(Solver):
+    """ inherits from the default solver Class """
+
+    def __init__(self, C = None, Q = None, G = None, v = True):
+        super(GSSolver, self).__init__(C, Q, G, v)
+        self.r = 64                                                 # number of jump distances
+        self.dpBits = None                                          # zero bits of a distinguished point
+        self.negation = True                                        # walk on classes {P, -P}
+        self.walks = 16                                             # walks advanced together
+
+
+    def setJumps(self, r):
+        """ sets the number of jump distances """
+        self.r = r
+
+    def setDistinguishedBits(self, bits):
+        """ a walk stops when this many bits of x are zero, None picks it
+            from the width of the interval """
+        self.dpBits = bits
+
+    def setNegation(self, negation):
+        """ walks on classes {P, -P}, lowering the expected steps """
+        self.negation = negation
+
+    def setWalks(self, walks):
+        """ sets how many walks are advanced together, with one inversion
+            per step of all of them """
+        self.walks = walks
+
+
+    def solveSmall(self, lo, hi, centre, shifted, order):
+        """ checks every key in an interval too narrow for the tame and
+            wild sets to have points other than infinity """
+
+        self.k = None
+
+        if shifted.inf:                                             # Q' = 0.G, so k is the centre
+            self.k = centre % order
+        else:
+            P = mul(self.G, lo)
+
+            for n in range(lo, hi + 1):
+                if P == self.Q:
+                    self.k = n % order
+                    break
+
+                P += self.G                                         # increment to next nG
+                self.count += 1                                     # increment count
+
+        self.time = time.time() - self.start
+
+        if self.k is None:
+            if self.verbose:
+                print("Failed")
+
+            self.k = 1
+            return 0
+
+        self.space = 2                                              # a single point
+
+        if self.verbose:
+            print("k:", self.k)
+            print("Time taken: %.3f s" % (self.time))               # print time taken
+            print("Space used: %d" % (self.space))                  # print space used
+            print("Numbers checked:", self.count)                   # print total count
+
+        return True
+
+
+    def solve(self, lo = None, hi = None):
+        """ runs tame and wild walks until two that give k meet at a
+            distinguished point, by default the key is looked for in the
+            upper half of G's order """
+
+        # sanity check
+        if self.G is None or self.curve is None or self.Q is None:
+            print("Can't solve not all parameters are set")
+            return False                                            # unsuccessful
+
+        self.count = 1                                              # initial count
+        self.start = time.time()
+
+        order = self.curve.order(self.G)                            # get order of generator
+
+        if lo is None:
+            lo = order // 2                                         # start of search interval
+        if hi is None:
+            hi = order - 1                                          # end of search interval
+
+        ############ SHIFT TO [-N/2, N/2] ############
+        width = hi - lo + 1
+        centre = lo + width // 2
+        shifted = self.Q - mul(self.G, centre)                      # Q' = (k - centre)G
+        half, quarter = width // 2, width // 4
+
+        if width < SMALL_WIDTH or shifted.inf:                      # a set may only hold infinity
+            return self.solveSmall(lo, hi, centre, shifted, order)
+
+        mean = max(1, int(math.sqrt(width)) // 4)                   # short jumps keep walks in their set
+        dpBits = self.dpBits
+        if dpBits is None and self.negation:                        # +-jumps soon revisit points, so
+            dpBits = max(0, width.bit_length() // 4 - 3)            # walks must stop well before they do
+        elif dpBits is None:                                        # about sqrt(width) / 32 steps per walk
+            dpBits = max(0, width.bit_length() // 2 - 5)
+
+        sizes = [1 + secrets.randbelow(2 * mean) for _ in range(self.r + 1)]
+        walk = RAddingWalk(self.G, None, order, self.r, 0, self.negation)
+        walk.restore(([(s, 0) for s in sizes[1:]], None))           # jumps s.G only
+        walk.exit = walk.at(sizes[0], 0)                            # doubling would leave the sets
+        walk = walk.retarget(shifted)
+
+        kinds = [0]                                                 # walks started so far
+        base = FixedBaseTable(self.G, half.bit_length(), startWidth(width))
+        counts = {"add": len(base), "double": 0}                    # point operations finding starts
+
+        def starts():
+            """ alternately a random tame or wild starting point, G if
+                START_TRIES of them are all at infinity """
+
+            kinds[0] += 1
+
+            for _ in range(START_TRIES):                            # walks can't start at infinity
+                if kinds[0] % 2:                                    # tame, aG for |a| <= N/2
+                    a, b = secrets.randbelow(2 * half + 1) - half, 0
+                else:                                               # wild, Q' + aG for |a| <= N/4
+                    a, b = secrets.randbelow(2 * quarter + 1) - quarter, 1
+
+                P = base.mul(abs(a), counts)                        # one addition per window of |a|
+
+                if a < 0:
+                    P = P.inverted()
+
+                if b:
+                    P = P + shifted
+                    counts["add"] += 1
+
+                if not P.inf:
+                    return walk.canonical(P, a % order, b)
+
+            return walk.canonical(self.G, 1, 0)                     # tame, a = 1 is in every set
+
+        ############ GAUDRY-SCHOST ############
+        table = {}                                                  # distinguished point -> (a, b)
+        walked = 0                                                  # steps taken by every walk
+        limit = 64 * int(math.sqrt(width)) + (64 << dpBits) * self.walks
+        self.k = None
+
+        for key, a, b, steps in schostWalks(walk, dpBits, self.walks, starts):
+            walked += steps
+            self.count = 1 + walked + counts["add"] + counts["double"]  # steps and start points
+
+            if key in table:                                        # same point, k' if b differs
+                k = solveCollision(self.G, shifted, order, a, b, *table[key])
+
+                if k is not None:
+                    self.k = (k + centre) % order
+                    break
+            else:
+                table[key] = (a, b)
+
+            if self.count > limit:                                  # k can't be in the interval
+                break
+
+        self.count = 1 + walked + counts["add"] + counts["double"]
+        self.time = time.time() - self.start
+
+        if self.k is None:
+            if self.verbose:
+                print("Failed")
+
+            self.k = 1
+            return 0
+
+        # set space, the jumps, the start table, every walk's point and the distinguished points
+        self.space = 2 * self.r + 2 * len(base) + 3 * self.walks + 3 * len(table)
+
+        if self.verbose:
+            print("k:", self.k)
+            print("Distinguished points:", len(table))
+            print("Walk steps:", walked)
+            print("Time taken: %.3f s" % (self.time))               # print time taken
+            print("Space used: %d" % (self.space))                  # print space used
+            print("Numbers checked:", self.count)                   # print total count
+
+        return True
+
+
+############ COMMAND LINE INTERFACE #########
+
+if __name__ == '__main__':
+    solver = GSSolver()
+
+    if len(sys.argv) >= 8:
+        c_a = int(sys.argv[1])
+        c_b = int(sys.argv[2])
+        c_fp = int(sys.argv[3])
+        G_x = int(sys.argv[4])
+        G_y = int(sys.argv[5])
+        Q_x = int(sys.argv[6])
+        Q_y = int(sys.argv[7])
+        C = Curve(c_a, c_b, c_fp)
+        G = Point(G_x, G_y, C)
+        Q = Point(Q_x, Q_y, C)
+        solver.setCurve(C)
+        solver.setG(G)
+        solver.setQ(Q)
+    if len(sys.argv) == 9:
+        solver.setVerbose(int(sys.argv[8]))
+
+    s = solver.solve()
+    if not s:
+        print("Input not of correct form: python3 gaudry_schost.py curve_a curve_b curve_fp G_x G_y Q_x Q_y [verbose]")
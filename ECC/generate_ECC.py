@@ -140,7 +140,7 @@ class KeyGen:
         half = self.curve.ord // 2
         self.k = half + secrets.randbelow(half)                     # get random number in the upper half of order's range
 
-        self.Q = self.G * self.k                                    # Q = kP
+        self.Q = curves.mul(self.G, self.k)                         # Q = kP
 
         if self.verbose:
             print("k = %s  G = %s   Q = %s" % (self.k, self.G, self.Q))
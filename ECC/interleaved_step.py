@@ -0,0 +1,128 @@
+#
+#    File: interleaved_step.py
+#    Author: Alexander Craig
+#    Project: An Analysis of the Security of RSA & Elliptic Curve Cryptography
+#    Supervisor: Maximilien Gadouleau
+#    Version: 1.0
+#    Date: 18/10/26
+#
+#    Functionality: uses Terr's interleaved babystep-giant-step method to
+#                   caclualte a private ECC key from a given public key set,
+#                   without needing to know the order of the base point
+#
+#    Instructions: intended use is to import this file and use the Class as defined
+#
+#    CLI: for testing can be used from command line -
+#           python3 interleaved_step.py curve_a curve_b curve_fp G_x G_y Q_x Q_y [verbose]
+#           for base-point G and public-point Q
+#
+
+############ IMPORTS #########
+
+# needed for pydocs to correctly find everything
+import sys
+sys.path.append('Programming/')
+
+# allows me to run this file directly, i.e. not wrapped up in the package
+if not __package__:
+    sys.path.append('../')
+
+import time
+from ECC.curves import *
+from ECC.solver import Solver
+
+############ MAIN CODE #########
+
+class ISSolver(Solver):
+    """ inherits from the default solver Class """
+
+    def solve(self):
+        """ Terr's variant of baby-step giant-step, in round j the baby step
+            jG is added to the table and the giant step Q - T(j-1)G is looked
+            up, where T(j) = 1 + 2 + ... + j, so the giant strides grow by one
+            each round and together cover every k in order, finishing after
+            about sqrt(2k) rounds without ever asking for the order of G """
+
+        # sanity check
+        if self.G is None or self.curve is None or self.Q is None:
+            print("Can't solve not all parameters are set")
+            return False                                            # unsuccessful
+
+        ############ FIND MULTIPLIER #########
+        self.count = 1                                              # initial count
+        self.start = time.time()
+
+        babySteps = {}                                              # store hash table as dictionary
+        B = self.curve.pointAtInf()                                 # current baby step jG
+        babySteps[B.key()] = 0                                      # initial point
+
+        Y = self.Q                                                  # current giant step Q - T.G
+        T = 0                                                       # triangular number T(j-1)
+        j = 0
+        self.k = None
+
+        while self.k is None:
+            j += 1
+            B += self.G                                             # next baby step jG
+            self.count += 1                                         # increment count
+
+            if B.inf:                                               # j is the order of G, the
+                full = True                                         # table now holds every multiple
+            else:
+                full = False
+                babySteps[B.key()] = j                              # create look up table
+
+            n = babySteps.get(Y.key())                              # Q - T(j-1)G = nG, n <= j
+
+            if n is not None:                                       # if it is in out lookup table
+                self.k = T + n
+            elif full:
+                # sanity check
+                if self.verbose:
+                    print ("Point not found")
+
+                return 0
+            else:
+                Y -= B                                              # Q - T(j)G
+                T += j
+                self.count += 1                                     # increment count
+
+        self.time = time.time() - self.start
+
+        # set space
+        self.space = len(babySteps) * 2
+
+        if self.verbose:
+            print("k:", self.k)
+            print("Time taken: %.3f s" % (self.time))               # print time taken
+            print("Space used: %d" % (self.space))                  # print space used
+            print("Numbers checked:", self.count)                   # print total count
+
+        return True
+
+
+############ COMMAND LINE INTERFACE #########
+
+if __name__ == '__main__':
+    solver = ISSolver()
+
+    if len(sys.argv) >= 8:
+        c_a = int(sys.argv[1])
+        c_b = int(sys.argv[2])
+        c_fp = int(sys.argv[3])
+        G_x = int(sys.argv[4])
+        G_y = int(sys.argv[5])
+        Q_x = int(sys.argv[6])
+        Q_y = int(sys.argv[7])
+        C = Curve(c_a, c_b, c_fp)
+        G = Point(G_x, G_y, C)
+        Q = Point(Q_x, Q_y, C)
+        solver.setCurve(C)
+        solver.setG(G)
+        solver.setQ(Q)
+    if len(sys.argv) == 9:
+        solver.setVerbose(int(sys.argv[8]))
+
+    s = solver.solve()
+    if not s:
+        print("Input not of correct form: python3 interleaved_step.py curve_a curve_b curve_fp G_x G_y Q_x Q_y [verbose]")
@@ -0,0 +1,255 @@
+#
+#    File: multi_rho.py
+#    Author: Alexander Craig
+#    Project: An Analysis of the Security of RSA & Elliptic Curve Cryptography
+#    Supervisor: Maximilien Gadouleau
+#    Version: 1.0
+#    Date: 18/10/26
+#
+#    Functionality: uses multi-target pollard's rho to caclualte private ECC
+#                   keys from many public keys on the same curve, sharing the
+#                   work of every earlier key with the later ones
+#
+#    Instructions: intended use is to import this file and use the Class as defined
+#
+#    Notes: every walk only adds multiples of G, so walks from different
+#           public points move identically and reach the same distinguished
+#           points, those with a known log are kept in a DPTable that grows
+#           with each solved key, m keys then cost about sqrt(m.n) steps in
+#           total rather than m.sqrt(n), a table can also be precomputed
+#           (as in Bernstein and Lange's small discrete log tables) and kept
+#           in a TableCache with a directory, to be loaded on startup
+#
+#    CLI: for testing can be used from command line -
+#           python3 multi_rho.py curve_a curve_b curve_fp G_x G_y Q_x Q_y [verbose]
+#           for base-point G and public-point Q
+#
+
+############ IMPORTS #########
+
+# needed for pydocs to correctly find everything
+import sys
+sys.path.append('Programming/')
+
+# allows me to run this file directly, i.e. not wrapped up in the package
+if not __package__:
+    sys.path.append('../')
+
+import time
+from ECC.curves import *
+from ECC.pollard_rho import PRSolver, RAddingWalk, rhoWalks, solveCollision
+from ECC.tables import DPTable, dpCache
+
+############ MAIN CODE #########
+
+class MRSolver(PRSolver):
+    """ inherits from the pollard rho solver Class, for its walk options,
+        every walk is advanced in this process """
+
+    def __init__(self, C = None, Q = None, G = None, v = True):
+        super(MRSolver, self).__init__(C, Q, G, v)
+        self.cache = dpCache                                        # keeps tables between keys
+        self.tableSize = 0                                          # points to precompute
+        self.table = None                                           # (cache key, DPTable) last used
+
+
+    def setCache(self, cache):
+        """ sets the TableCache tables are kept in, None to only keep the
+            table of the last curve solved """
+        self.cache = cache
+
+    def setTableSize(self, size):
+        """ sets how many distinguished points to precompute from walks on
+            multiples of G before solving, 0 only keeps those found by
+            solving earlier keys """
+        self.tableSize = size
+
+
+    def tableBits(self, order):
+        """ zero bits of a distinguished point, for walks of about
+            sqrt(order / T) steps to one of the T points in the table """
+
+        if self.dpBits is not None:
+            return self.dpBits
+
+        size = max(self.tableSize, 1 << 10)
+
+        return max(3, (order.bit_length() - size.bit_length()) // 2 - 1)
+
+
+    def tableWalk(self, table, order):
+        """ the walk on multiples of G that found the table's points """
+
+        auto = self.curve.automorphism(self.G, order) if self.automorphism else None
+        walk = RAddingWalk(self.G, None, order, self.r, self.doublings,
+                           self.negation or self.automorphism, auto)
+
+        if table is not None:
+            walk.restore(table.walk)
+
+        return walk
+
+
+    def loadTable(self, order):
+        """ the cache key and DPTable for this curve, base point and walk
+            options, a new table with a new walk if there isn't one """
+
+        cacheKey = (self.curve.a, self.curve.b, self.curve.fp, self.G.key(), order,
+                    self.r, self.doublings, int(self.negation), int(self.automorphism))
+
+        if self.table is not None and self.table[0] == cacheKey:   # same as the last key
+            return self.table
+
+        cached = self.cache.get(cacheKey) if self.cache is not None else None
+
+        if cached is not None:
+            table = cached[0]
+        else:
+            walk = self.tableWalk(None, order)
+            table = DPTable(walk.coefficients(), self.tableBits(order), order)
+
+            if self.cache is not None:
+                self.cache.put(cacheKey, (table, order))
+
+        self.table = (cacheKey, table)
+
+        return self.table
+
+
+    def precompute(self, order = False):
+        """ walks from random multiples of G until the table holds tableSize
+            distinguished points, this can be done once offline if the
+            cache has a directory, returns the table """
+
+        if not order:                                               # if order not yet set
+            order = self.curve.order(self.G)                        # get order of generator
+
+        cacheKey, table = self.loadTable(order)
+
+        if len(table) >= self.tableSize:
+            return table
+
+        walk = self.tableWalk(table, order)
+        added = 0
+
+        for key, a, _, steps in rhoWalks(walk, table.dpBits, self.walks):
+            table.steps += steps                                    # offline steps
+            added += table.add(key, a)
+
+            if len(table) >= self.tableSize:
+                break
+
+        table.walk = walk.coefficients()                            # keep the restart points too
+
+        if self.cache is not None:
+            self.cache.grow(cacheKey, added)
+
+        return table
+
+
+    def solve(self, order = False):
+        """ walks from aG + bQ, using the same walk as the table, until a
+            distinguished point with a known log is reached or two of its
+            own walks meet, then adds every point it reached to the table """
+
+        # sanity check
+        if self.G is None or self.curve is None or self.Q is None:
+            print("Can't solve not all parameters are set")
+            return False                                            # unsuccessful
+
+        self.count = 1                                              # initial count
+        self.start = time.time()
+
+        if not order:                                               # if order not yet set
+            order = self.curve.order(self.G)                        # get order of generator
+
+        self.k = None
+
+        cacheKey, table = self.loadTable(order)
+
+        if len(table) < self.tableSize:
+            table = self.precompute(order)
+            self.start = time.time()                                # precomputation isn't timed
+
+        walk = self.tableWalk(table, order).retarget(self.Q)
+        pending = {}                                                # this key's points -> (a, b)
+
+        for key, a, b, steps in rhoWalks(walk, table.dpBits, self.walks):
+            self.count += steps                                     # increment count
+
+            log = table.get(key)
+
+            if log is not None:                                     # reached a known point
+                self.k = solveCollision(self.G, self.Q, order, a, b, log, 0)
+            elif key in pending:                                    # two of its walks have met
+                self.k = solveCollision(self.G, self.Q, order, a, b, *pending[key])
+            else:
+                pending[key] = (a, b)
+
+            if self.k is not None:
+                break
+
+        # every point this key's walks reached now has a known log
+        added = sum(table.add(key, a + b * self.k) for key, (a, b) in pending.items())
+
+        if self.cache is not None:
+            self.cache.grow(cacheKey, added)
+
+        self.time = time.time() - self.start
+
+        # set space, the walk's points, every walk's point and both tables
+        self.space = 3 * self.r + 3 * self.walks + 2 * len(table) + 3 * len(pending)
+
+        if self.verbose:
+            print("k:", self.k)
+            print("Table size:", len(table))
+            print("Precomputation steps:", table.steps)
+            print("Time taken: %.3f s" % (self.time))               # print time taken
+            print("Space used: %d" % (self.space))                  # print space used
+            print("Numbers checked:", self.count)                   # print total count
+
+        return True
+
+
+    def solveAll(self, targets, order = False):
+        """ solves every public point in turn with the same table, returning
+            the list of their keys and leaving count as the total """
+
+        keys, count = [], 0
+
+        for Q in targets:
+            self.setQ(Q)
+            self.solve(order)
+            keys.append(self.k)
+            count += self.count
+
+        self.count = count
+
+        return keys
+
+
+############ COMMAND LINE INTERFACE #########
+
+if __name__ == '__main__':
+    solver = MRSolver()
+
+    if len(sys.argv) >= 8:
+        c_a = int(sys.argv[1])
+        c_b = int(sys.argv[2])
+        c_fp = int(sys.argv[3])
+        G_x = int(sys.argv[4])
+        G_y = int(sys.argv[5])
+        Q_x = int(sys.argv[6])
+        Q_y = int(sys.argv[7])
+        C = Curve(c_a, c_b, c_fp)
+        G = Point(G_x, G_y, C)
+        Q = Point(Q_x, Q_y, C)
+        solver.setCurve(C)
+        solver.setG(G)
+        solver.setQ(Q)
+    if len(sys.argv) == 9:
+        solver.setVerbose(int(sys.argv[8]))
+
+    s = solver.solve()
+    if not s:
+        print("Input not of correct form: python3 multi_rho.py curve_a curve_b curve_fp G_x G_y Q_x Q_y [verbose]")
@@ -3,14 +3,21 @@
 #    Author: Alexander Craig
 #    Project: An Analysis of the Security of RSA & Elliptic Curve Cryptography
 #    Supervisor: Maximilien Gadouleau
-#    Version: 1.3
-#    Date: 20/03/19
+#    Version: 1.4
+#    Date: 18/10/26
 #
 #    Functionality: uses pohlig_hellman method to caclualte
 #                   a private ECC key from a given public key set
 #
 #    Instructions: intended use is to import this file and use the Class as defined
 #
+#    Notes: k mod p^e is found one base-p digit at a time, so every prime
+#           power only costs e logs in the subgroup of order p, each of
+#           which goes to the cheapest solver for that size of p, a lookup
+#           table of every multiple for tiny p, BSGS for medium p and rho
+#           for large p, the sub-solvers are given the subgroup order so
+#           Pari isn't asked for it again
+#
 #    CLI: for testing can be used from command line -
 #           python3 pohlig_hellman.py curve_a curve_b curve_fp G_x G_y Q_x Q_y [verbose]
 #           for base-point G and public-point Q
@@ -21,12 +28,10 @@
 # needed for pydocs to correctly find everything
 import sys
 sys.path.append('Programming/')
-filePath = ""
 
 # allows me to run this file directly, i.e. not wrapped up in the package
 if not __package__:
     sys.path.append('../')
-    filePath = "../"
 
 # to make it backwards compatable with Python < 3.6
 try:
@@ -34,59 +39,124 @@ try:
 except ImportError:
     from utils import secrets
 
-import pickle
 import time
-from ECC import baby_step
+from ECC import baby_step, pollard_rho
 from ECC.curves import *
 from ECC.solver import Solver
+from ECC.tables import TableCache
 from utils.helper import extended_gcd
 
 
-############ GLOBAL CONSTANT #########
+############ GLOBAL CONSTANTS #########
 
-# we load the first million primes from memory
-with open(filePath + "utils/millionPrimes.pkl", "rb") as f:
-    primes = pickle.load(f)
+TABLE_MAX = 1 << 8                                                      # largest prime given a lookup table
+BSGS_MAX = 1 << 36                                                      # largest prime given to BSGS, then rho
 
 
-############ PRIME FACTORISATION ############
+############ MAIN CODE ############
 
-def primeFac(n):
-    """ given a number returns a list of its prime factors """
+class PHSolver(Solver):
+    """ inherits from the default solver Class """
 
-    factors = {}
-    p = 0
+    def __init__(self, C = None, Q = None, G = None, v = True):
+        super(PHSolver, self).__init__(C, Q, G, v)
+        self.tableDir = None                                            # on-disk BSGS tables if set
+        self.tableMax = TABLE_MAX                                       # primes up to this use a lookup table
+        self.bsgsMax = BSGS_MAX                                         # primes up to this use BSGS, then rho
+        self.bsgs = baby_step.BGSolver(v = False)                       # sub-solvers kept between primes
+        self.rho = pollard_rho.PRSolver(v = False)
+        self.tables = TableCache()                                      # one prime's baby steps, for its digits
+        self.bsgs.setCache(self.tables)
 
-    while n != 1:                                                       # until n is 1 we don't have all the prime factors
 
-        prime = primes[p]
+    def setOutOfCore(self, directory):
+        """ lets primes above bsgsMax use BSGS with its table on disk
+            rather than rho, None uses rho for them """
+        self.tableDir = directory
 
-        pCount = 0
 
-        while n % prime == 0:                                           # while we can divide with no remainder
-            n = int(n/prime)                                            # perform division
-            pCount += 1                                                 # increment our count
+    def setThresholds(self, tableMax, bsgsMax):
+        """ primes up to tableMax are looked up in a table of every
+            multiple, those up to bsgsMax use BSGS, and larger ones rho """
+        self.tableMax = tableMax
+        self.bsgsMax = bsgsMax
 
-        if pCount != 0:                                                 # see if it ever worked
-            factors[prime] = pCount                                     # add to dictionary
 
-        p += 1                                                          # get next prime
+    def subSolver(self, prime):
+        """ the cheapest solver for a subgroup of this prime order, None
+            for a lookup table """
 
-        if p == len(primes):                                            # if we have run out of primes
-            factors[n] = 1                                              # add the remaining amount
-            break                                                       # break out of while loop
+        if prime <= self.tableMax:
+            return None
 
-    return factors
+        if prime <= self.bsgsMax:
+            self.bsgs.setOutOfCore(None)                                # table fits in memory
+            return self.bsgs
 
+        if self.tableDir is not None:                                   # too large for memory, so on disk
+            self.bsgs.setOutOfCore(self.tableDir)
+            return self.bsgs
 
-############ MAIN CODE ############
+        return self.rho
+
+
+    def solvePrimePower(self, order, prime, power):
+        """ finds k mod prime^power one base-prime digit at a time, each
+            digit being the log of a point in the subgroup of order prime """
+
+        gamma = self.G * (order // prime)                               # generates the subgroup of order prime
+        solver = self.subSolver(prime)
+        table = None
+        self.tables.clear()                                             # the last prime's baby steps
+
+        if solver is None:                                              # every multiple of gamma, 0 to prime - 1
+            table = {}
+            P = self.curve.pointAtInf()
+
+            for d in range(prime):
+                table[P.key()] = d
+                P += gamma
+
+            self.count += prime                                         # increment count
+            self.subSpace = max(self.subSpace, 2 * prime)
+        else:
+            solver.setCurve(self.curve)
+            solver.setG(gamma)
+
+        k = 0                                                           # k mod prime^i so far
+        pi = 1                                                          # prime^i
+
+        for i in range(power):
+            # removes the digits already known, leaving digit i times gamma
+            h = (self.Q - self.G * k) * (order // (pi * prime))
+
+            if h.inf:                                                   # digit is 0
+                d = 0
+            elif table is not None:
+                d = table.get(h.key())
+            else:
+                solver.setQ(h)
+
+                # solve the smaller problem of h = d * gamma with order prime
+                if not solver.solve(prime):                             # specify the sub group order
+                    return None
+
+                d = solver.k % prime                                    # extract multiplier
+                self.count += solver.count                              # increment count
+                self.subSpace = max(self.subSpace, solver.space)
+
+            if d is None:
+                return None
+
+            k += d * pi
+            pi *= prime
+
+        return k
 
-class PHSolver(Solver):
-    """ inherits from the default solver Class """
 
     def solve(self):
-        """ uses factoring to break groups into smaller cycic groups
-            then applies BSGS """
+        """ uses factoring to break groups into smaller cyclic groups,
+            then lifts k modulo each prime power a digit at a time """
 
         # sanity check
         if self.G is None or self.curve is None or self.Q is None:
@@ -95,11 +165,12 @@ class PHSolver(Solver):
 
         self.count = 0                                                  # initial count
         self.start = time.time()
+        self.subSpace = 0                                               # largest sub-solver space
 
         order = self.curve.order(self.G)                                # get order of generator
 
         ############ POHLIG HELLMAN ############
-        factors = primeFac(order)                                       # get factor decomposition
+        factors = self.curve.factorOrder(self.G)                        # get factor decomposition, cached
         self.k = 0
 
         if self.verbose:
@@ -109,29 +180,16 @@ class PHSolver(Solver):
             newOrd = prime ** power                                     # calculate this subgroups order
             num = order // newOrd                                       # calculate number from order
 
-            Gnum = self.G * num                                         # calculate two points on the curve
-            Qnum = self.Q * num
+            k_num = self.solvePrimePower(order, prime, power)          # k mod newOrd
 
-            # now solve the smaller problem of Qnum = k_num * Gnum with order newOrd
-            # using BSGS
-            BSGS = baby_step.BGSolver(self.curve, Qnum, Gnum, False)    # initialise solver
+            if k_num is None:
+                self.tables.clear()
 
-            # sanity check
-            if Gnum == self.Q:
-                self.k = num
-                break
-
-            solved = BSGS.solve()                                       # specify the sub group order
-
-            if not solved:
                 if self.verbose:
                     print("Failed")
 
                 return 0
 
-            k_num = BSGS.k                                              # extract multiplier
-            self.count += BSGS.count                                    # increment count
-
             # chinese remainder theorem
             gcd, quotient = extended_gcd(num, newOrd)
 
@@ -140,11 +198,12 @@ class PHSolver(Solver):
             self.k += add_k
 
         self.k = self.k % order                                         # modulo
+        self.tables.clear()                                             # no table outlives the solve
 
         self.time = time.time() - self.start
 
         # set space
-        self.space = len(factors) + BSGS.space
+        self.space = len(factors) + self.subSpace
 
         if self.verbose:
             print("k:", self.k)
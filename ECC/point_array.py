@@ -0,0 +1,177 @@
+#
+#    File: point_array.py
+#    Author: Alexander Craig
+#    Project: An Analysis of the Security of RSA & Elliptic Curve Cryptography
+#    Supervisor: Maximilien Gadouleau
+#    Version: 1.0
+#    Date: 18/10/26
+#
+#    Functionality: vectorised arithmetic on arrays of points over small
+#                   prime fields, so thousands of additions are done at once
+#
+#    Instructions: intended use is to import this file as a module and to
+#                  use the class and functions as defined
+#
+#    Notes: coordinates are kept in int64 NumPy arrays, which is only exact
+#           while the product of two field elements fits, i.e. for p < 2^31,
+#           use supported() to check a curve first, inverses are found with
+#           Fermat's little theorem so every element is inverted at once
+#
+
+############ IMPORTS #########
+
+# needed for pydocs to correctly find everything
+import sys
+sys.path.append('Programming/')
+
+# allows me to run this file directly, i.e. not wrapped up in the package
+if not __package__:
+    sys.path.append('../')
+
+import numpy as np
+from ECC.curves import Point
+
+
+############ GLOBAL CONSTANTS #########
+
+MAX_FIELD = 1 << 31                                                     # largest field products fit in int64
+MIN_SIZE = 256                                                          # fewest points worth vectorising
+
+
+############ EXTRA FUNCTIONS #########
+
+def supported(curve, size = MIN_SIZE):
+    """ checks the curve's field is small enough for PointArray and that
+        arrays of this many points are large enough to beat batchAdd """
+    return curve.fp < MAX_FIELD and size >= MIN_SIZE
+
+
+def modPow(values, e, p):
+    """ raises every element of an array to the power e mod p, using
+        square and multiply on the whole array at once """
+
+    result = np.ones_like(values)
+    base = values % p
+
+    while e:
+        if e & 1:
+            result = (result * base) % p
+
+        base = (base * base) % p
+        e >>= 1
+
+    return result
+
+
+def modInverses(values, p):
+    """ inverts every element of an array mod the prime p as a^(p - 2),
+        zeros are left as zero """
+    return modPow(values, p - 2, p)
+
+
+def fromPoints(points):
+    """ creates a PointArray from a list of Points """
+
+    curve = points[0].curve
+
+    return PointArray(curve,
+                      np.array([0 if P.inf else P.x for P in points], dtype = np.int64),
+                      np.array([0 if P.inf else P.y for P in points], dtype = np.int64),
+                      np.array([P.inf for P in points], dtype = bool))
+
+
+def repeat(P, n):
+    """ a PointArray holding n copies of the Point P """
+
+    return PointArray(P.curve,
+                      np.full(n, 0 if P.inf else P.x, dtype = np.int64),
+                      np.full(n, 0 if P.inf else P.y, dtype = np.int64),
+                      np.full(n, P.inf, dtype = bool))
+
+
+############ POINT ARRAY CLASS #########
+
+class PointArray:
+    """ an array of affine points on one curve, stored as arrays of x and
+        y coordinates and a mask of which points are at infinity """
+
+    def __init__(self, curve, x, y, inf = None):
+        self.curve = curve                                              # curve the points are on
+        self.x = x                                                      # x coordinates
+        self.y = y                                                      # y coordinates
+        self.inf = inf if inf is not None else np.zeros(len(x), dtype = bool)
+
+
+    def __len__(self):
+        """ number of points """
+        return len(self.x)
+
+
+    def __getitem__(self, index):
+        """ a Point for an integer index, else a PointArray of the selection """
+
+        if isinstance(index, (int, np.integer)):
+            if self.inf[index]:
+                return self.curve.pointAtInf()
+
+            return Point(int(self.x[index]), int(self.y[index]), self.curve)
+
+        return PointArray(self.curve, self.x[index], self.y[index], self.inf[index])
+
+
+    def __setitem__(self, index, other):
+        """ replaces the selected points with those of another PointArray """
+
+        self.x[index] = other.x
+        self.y[index] = other.y
+        self.inf[index] = other.inf
+
+
+    def toPoints(self):
+        """ converts back to a list of Points """
+        return [self[i] for i in range(len(self))]
+
+
+    def keys(self):
+        """ an array of Point.key() for every point """
+        return np.where(self.inf, -1, (self.x << 1) | (self.y & 1))
+
+
+    def inverted(self):
+        """ negates every point """
+        return PointArray(self.curve, self.x, (-self.y) % self.curve.fp, self.inf)
+
+
+    def double(self):
+        """ doubles every point """
+        return self + self
+
+
+    def __add__(self, other):
+        """ adds another PointArray of the same length, or a single Point to
+            every point, all the slopes are inverted together """
+
+        if isinstance(other, Point):
+            other = repeat(other, len(self))
+
+        fp = self.curve.fp
+        x1, y1, x2, y2 = self.x, self.y, other.x, other.y
+
+        finite = ~self.inf & ~other.inf
+        chord = finite & (x1 != x2)                                     # distinct x, the usual case
+        tangent = finite & (x1 == x2) & (y1 == y2) & (y1 != 0)          # doubling
+        opposite = finite & ~chord & ~tangent                           # P + (-P)
+
+        numerator = np.where(chord, y2 - y1, ((x1 * x1) % fp) * 3 + self.curve.a) % fp
+        denominator = np.where(chord, x2 - x1, 2 * y1) % fp
+        denominator[~(chord | tangent)] = 1                             # no slope needed
+
+        grad = (numerator * modInverses(denominator, fp)) % fp
+        x3 = (grad * grad - x1 - x2) % fp
+        y3 = (grad * ((x1 - x3) % fp) - y1) % fp
+
+        x3 = np.where(self.inf, x2, np.where(other.inf, x1, x3))        # infinity is the identity
+        y3 = np.where(self.inf, y2, np.where(other.inf, y1, y3))
+        inf = (self.inf & other.inf) | opposite
+
+        return PointArray(self.curve, x3, y3, inf)
@@ -3,14 +3,21 @@
 #    Author: Alexander Craig
 #    Project: An Analysis of the Security of RSA & Elliptic Curve Cryptography
 #    Supervisor: Maximilien Gadouleau
-#    Version: 1.2
-#    Date: 22/03/19
+#    Version: 1.3
+#    Date: 18/10/26
 #
-#    Functionality: uses pollard's lambda method to caclualte
-#                   a private ECC key from a given public key set
+#    Functionality: uses pollard's lambda (kangaroo) method to caclualte
+#                   a private ECC key from a given public key set, when the
+#                   key is known to lie in an interval [lo, hi]
 #
 #    Instructions: intended use is to import this file and use the Class as defined
 #
+#    Notes: every jump adds one of a few precomputed points s.G, so costs a
+#           single addition, tame and wild kangaroos set traps at
+#           distinguished points and a key in an interval of width N is
+#           found in about 2.sqrt(N) jumps, herds of kangaroos can be spread
+#           over several processes for a linear speedup
+#
 #    CLI: for testing can be used from command line -
 #           python3 pollard_lambda.py curve_a curve_b curve_fp G_x G_y Q_x Q_y [verbose]
 #           for base-point G and public-point Q
@@ -33,115 +40,328 @@ except ImportError:
     from utils import secrets
 
 import math
+import multiprocessing
+import queue
 import time
 from ECC.curves import *
+from ECC.pollard_rho import received
 from ECC.solver import Solver
-from utils.helper import modInverse
+
+
+############ GLOBAL CONSTANTS #########
+
+TAME = 0                                                            # kangaroo at a known multiple of G
+WILD = 1                                                            # kangaroo at Q plus a known multiple
+
+
+############ JUMP TABLE #########
+
+class KangarooJumps:
+    """ the r jump distances s_i, random with the given mean, and the
+        points s_i.G, a kangaroo's next jump is picked from the low bits
+        of its x coordinate so it depends only on where it is """
+
+    def __init__(self, G, mean, r = 32, sizes = None):
+        self.G = G                                                  # base point
+        self.sizes = sizes or [1 + secrets.randbelow(2 * mean - 1) if mean > 1 else 1
+                               for _ in range(r)]                   # distances averaging mean
+        self.points = [mul(G, s) for s in self.sizes]               # s_i.G
+        self.r = len(self.sizes)
+        self.shift = self.r.bit_length() + 8                        # low bits of x used for jumps
+        self.mask = (1 << self.shift) - 1                           # enough for an even split
+
+
+    def index(self, P):
+        """ the jump P makes, using integer operations on x """
+        return (P.x & self.mask) % self.r
+
+
+    def distinguished(self, P, dpMask):
+        """ if P is a distinguished point, i.e. the bits of x above those
+            used for jumps are zero under the mask """
+        return not (P.x >> self.shift) & dpMask
 
 
 ############ EXTRA FUNCTIONS #########
 
-def g(P, n, order):
-    """ polynomial function for semi-randomness """
+def meanJump(width, kangaroos = 2):
+    """ the best mean jump for a herd of kangaroos in an interval of the
+        given width, about kangaroos.sqrt(width) / 4 """
+    return max(1, kangaroos * int(math.sqrt(width)) // 4)
 
-    xCoord = P.x                                                    # extract x coord
-    xCoord = bin(xCoord)                                            # get binary representation
-    xCoord = "0" * 4 + xCoord[2:]                                   # pad front with 0's
-    ind = int(xCoord[-4:], 2) + 1                                   # get random point by "hashing P"
 
-    moves = pow(2, int(ind + math.sqrt(n)) % n)                     # pollard said should be a power 2
+def kangarooBits(width, kangaroos = 2):
+    """ zero bits of a distinguished point, about sqrt(width) / 16 jumps
+        per kangaroo between traps """
+    return max(0, width.bit_length() // 2 - 3 - kangaroos.bit_length())
 
-    if moves % order == 0:                                          # ensure we actually move
-        moves += 2
 
-    return moves
+def herdStarts(lo, width, kangaroos, mean, offset = 0):
+    """ van Oorschot and Wiener's starting points for a herd, as (d, kind),
+        tame and wild kangaroos alternate, the i-th tame one starting at
+        the middle of the interval plus i.v and the i-th wild one at Q plus
+        i.v, the spacing v spreading each kind over about one mean jump so
+        they don't follow each other """
 
+    spacing = max(1, mean // max(1, kangaroos // 2))
+    middle = lo + width // 2
 
-############ MAIN CODE #########
+    return [(middle + (i // 2) * spacing + offset, TAME) if i % 2 == 0
+            else ((i // 2) * spacing + offset, WILD) for i in range(kangaroos)]
 
-class PLSolver(Solver):
-    """ inherits from the default solver Class """
 
-    def solve(self):
-        """ takes random walks around the cyclic groups and sets traps
-            in the hope that it catches another random walker """
+def kangaroo(G, Q, d, kind):
+    """ a kangaroo [P, d, kind] at P = d.G for a tame one, Q + d.G for a wild one """
 
-        # sanity check
-        if self.G is None or self.curve is None or self.Q is None:
-            print("Can't solve not all parameters are set")
-            return False                                                # unsuccessful
+    if kind == TAME:
+        return [mul(G, d), d, kind]
 
-        self.count = 1                                                  # initial count
-        self.start = time.time()
+    return [mulMulti([G, Q], [d, 1]), d, kind]
 
-        order = self.curve.order(self.G)                                # get order of generator
 
-        ############ POLLARD'S LAMBDA METHOD ############
-        a = order // 2                                                  # start of search interval
-        b = order - 1                                                   # end of search interval
+def nudge(G, roo, mean):
+    """ moves a kangaroo on by a random amount under the mean jump, so it
+        stops following another of the same kind """
+
+    s = 1 + secrets.randbelow(mean)
+    roo[0], roo[1] = roo[0] + mul(G, s), roo[1] + s
 
-        found = False
-        fail = False
-        n = 1
 
-        # will probably find a factor, so need to loop with random numbers until we find it
-        while (not found) and (not fail):
-            n += 1                                                      # change pseudo random generator
+def kangarooWalks(jumps, herd, dpBits, stop = None, snapshot = None, nudges = None):
+    """ jumps every kangaroo in the herd, a list of [P, d, kind], at once
+        so they share one inversion, and yields (key, kind, d, steps, j)
+        for every distinguished point reached by kangaroo j, steps being
+        the number taken since the last one, until stop is set, two
+        kangaroos of the same kind that meet here follow each other
+        forever so the later one is moved on by a random amount, as is
+        any kangaroo j put on the nudges queue by the coordinator, whenever
+        snapshot["due"] is set the (d, kind) of every kangaroo and the
+        unreported steps are put in snapshot at the end of the round """
 
-            if n > 25:                                                  # give up
-                fail = True
+    G = jumps.G
+    dpMask = (1 << dpBits) - 1
+    mean = sum(jumps.sizes) // jumps.r
+    check = max(1, 1024 // len(herd))                               # rounds between checks of stop
+    steps = rounds = 0                                              # steps since the last report
+    seen = {}                                                       # this herd's traps -> kind
+
+    while stop is None or rounds % check or not stop.is_set():
+        while nudges is not None and not rounds % check:            # followers the coordinator found
+            try:
+                nudge(G, herd[nudges.get_nowait()], mean)
+            except queue.Empty:
                 break
 
-            # TAME KNAGAROO
-            len_T = 0                                                   # tame kangaroo starts with 0 moves
-            pos_T = self.G * b                                          # tame starts at end
+        picks = [jumps.index(P) for P, _, _ in herd]
+        sums = batchAdd([P for P, _, _ in herd], [jumps.points[i] for i in picks])
+
+        for roo, S, i in zip(herd, sums, picks):
+            roo[0] = S
+            roo[1] += jumps.sizes[i]
+
+        steps += len(herd)
+        rounds += 1
+
+        for j, roo in enumerate(herd):
+            P, d, kind = roo
+
+            if not jumps.distinguished(P, dpMask):
+                continue
+
+            key = P.key()
+
+            if seen.get(key) == kind:                               # following another kangaroo
+                nudge(G, roo, mean)
+                continue
 
-            # moves until setting trap
-            trap = (g(self.G, n, order) + g(pos_T, n, order))           # trap moves dependant on our function
-            trap = int(trap / 4)                                        # divide by a constant and ensure int
+            seen[key] = kind
+            yield key, kind, d, steps, j
+            steps = 0
 
-            # move until in position to place trap
-            for t in range(trap):
-                self.count += 1                                         # increment count
-                moveT = g(pos_T, n, order)                              # get function on pos_T
-                len_T = (len_T + moveT) % order                         # tracks total path length
-                pos_T += self.G * moveT                                 # pseudo random jumps
+        if snapshot is not None and snapshot["due"]:
+            snapshot.update(due = False, herd = [(d, kind) for _, d, kind in herd], steps = steps)
 
-            # WILD KANGAROO RELEASED
-            len_W = 0                                                   # wild kangaroo starts making 0 moves
-            pos_W = self.Q                                              # start at point we need to calculate
 
-            moves = min(order * 100, 100000)                            # cap on number of moves
-            while len_W < (len_T + b - a) and moves:                    # limit on how many random moves we make
-                self.count += 1                                         # increment count
-                moves -= 1                                              # decrement moves remaining
+############ PARALLEL WORKER #########
 
-                moveW = g(pos_W, n, order)                              # get pseudo random move
-                len_W = (len_W + moveW) % order                         # add to dist travelled
-                pos_W += self.G * moveW                                 # update position
+def kangarooWorker(w, jumps, Q, herd, dpBits, stop, dps, nudges):
+    """ one of several processes, it makes its herd of kangaroos from
+        their (d, kind) and reports each trap they reach to the
+        coordinator, as (key, kind, d, steps, (w, j)), until told to stop,
+        moving on the kangaroos the coordinator finds following another
+        process's kangaroo of the same kind """
 
-                if pos_W == pos_T:                                      # if fallen in trap
-                    if self.verbose:
-                        print(b, len_T, len_W)
+    herd = [kangaroo(jumps.G, Q, d, kind) for d, kind in herd]
 
-                    self.k = (b + len_T - len_W) % order                # calculate k
-                    found = True                                        # set to found
+    for key, kind, d, steps, j in kangarooWalks(jumps, herd, dpBits, stop, None, nudges):
+        dps.put((key, kind, d, steps, (w, j)))
+
+
+############ MAIN CODE #########
+
+class PLSolver(Solver):
+    """ inherits from the default solver Class """
+
+    def __init__(self, C = None, Q = None, G = None, v = True):
+        super(PLSolver, self).__init__(C, Q, G, v)
+        self.r = 32                                                 # number of jump distances
+        self.dpBits = None                                          # zero bits of a distinguished point
+        self.retries = 4                                            # new jump tables before giving up
+        self.workers = 1                                            # processes to use
+        self.kangaroos = 1                                          # kangaroos per process, 2 at least in all
+
+
+    def setJumps(self, r):
+        """ sets the number of jump distances """
+        self.r = r
+
+    def setDistinguishedBits(self, bits):
+        """ a point is a trap if this many bits of x are zero, None picks
+            it from the width of the interval """
+        self.dpBits = bits
+
+    def setRetries(self, retries):
+        """ sets how many jump tables are tried before giving up """
+        self.retries = retries
+
+    def setWorkers(self, workers):
+        """ sets how many processes jump in parallel """
+        self.workers = workers
+
+    def setKangaroos(self, kangaroos):
+        """ sets how many kangaroos each process jumps together, with one
+            inversion per jump of all of them, half are tame and half wild """
+        self.kangaroos = kangaroos
+
+
+    def solve(self, lo = None, hi = None):
+        """ tame kangaroos start in the middle of [lo, hi] and wild ones at
+            Q, all jump forward setting traps at distinguished points, once
+            one lands in the trail of the other kind it follows it into the
+            next trap and k = tame distance - wild distance, by default the
+            key is looked for in the upper half of G's order, the herd can
+            be shared between worker processes """
+
+        # sanity check
+        if self.G is None or self.curve is None or self.Q is None:
+            print("Can't solve not all parameters are set")
+            return False                                                # unsuccessful
+
+        self.count = 1                                                  # initial count
+        self.start = time.time()
+
+        order = self.curve.order(self.G)                                # get order of generator
+
+        ############ POLLARD'S LAMBDA METHOD ############
+        if lo is None:
+            lo = order // 2                                             # start of search interval
+        if hi is None:
+            hi = order - 1                                              # end of search interval
+
+        width = hi - lo + 1
+        kangaroos = max(2, self.workers * self.kangaroos)               # the whole herd
+        dpBits = self.dpBits if self.dpBits is not None else kangarooBits(width, kangaroos)
+        limit = 16 * int(math.sqrt(width)) + kangaroos * (64 << dpBits) + 1024
+
+        checkpoint = self.checkpoint("lambda")
+        state = self.resumeState(checkpoint)
+        snapshot = {"due": False}                                       # kangaroos to checkpoint
+        self.k = None
+        attempt = 0
+
+        while self.k is None and attempt < self.retries:
+            attempt += 1
+
+            if state is not None:                                       # carry on the saved kangaroos
+                jumps = KangarooJumps(self.G, 1, self.r, state["jumps"])
+                traps, attempt, dpBits = state["traps"], state["attempt"], state["dpBits"]
+                herd = state["herd"]
+                self.count = state["count"]
+                self.start -= state["time"]
+                state = None
+
+                if herd is None or len(herd) != kangaroos:              # jumped in other processes
+                    mean = sum(jumps.sizes) // jumps.r
+                    herd = herdStarts(lo, width, kangaroos, mean, 1 + secrets.randbelow(mean))
+            else:
+                mean = meanJump(width, kangaroos)
+                jumps = KangarooJumps(self.G, mean, self.r)
+                herd = herdStarts(lo, width, kangaroos, mean)
+                traps = {}                                              # trap -> (kind, distance)
+
+            stopAt = self.count + limit
+            procs = []
+            following = set()                                           # (worker, kangaroo) told to move on
+
+            if self.workers == 1:                                       # every kangaroo in this process
+                nudges = [queue.Queue()]
+                source = ((key, kind, d, steps, (0, j)) for key, kind, d, steps, j
+                          in kangarooWalks(jumps, [kangaroo(self.G, self.Q, d, kind) for d, kind in herd],
+                                           dpBits, None, snapshot, nudges[0]))
+            else:
+                stop = multiprocessing.Event()
+                dps = multiprocessing.Queue()
+                nudges = [multiprocessing.Queue() for _ in range(self.workers)]
+
+                procs = [multiprocessing.Process(target = kangarooWorker,
+                                                 args = (p, jumps, self.Q, herd[p::self.workers],
+                                                         dpBits, stop, dps, nudges[p]))
+                         for p in range(self.workers)]
+
+                for proc in procs:
+                    proc.start()
+
+                source = received(dps, procs)
+
+            for key, kind, d, steps, (w, j) in source:
+                if checkpoint is not None and ("herd" in snapshot or procs and checkpoint.due()):
+                    checkpoint.save({"jumps": jumps.sizes, "herd": snapshot.pop("herd", None),
+                                     "traps": traps, "attempt": attempt, "dpBits": dpBits,
+                                     "count": self.count + snapshot.pop("steps", 0),
+                                     "time": time.time() - self.start})
+                elif checkpoint is not None and checkpoint.due():
+                    snapshot["due"] = True                              # saved once the herd next reports
+
+                self.count += steps                                     # increment count
+                other = traps.get(key)
+
+                if other is None:                                       # set a trap
+                    traps[key] = (kind, d)
+                    following.discard((w, j))                           # has left any trail it followed
+                elif other[0] != kind:                                  # fallen in the other's trap
+                    tame, wild = (d, other[1]) if kind == TAME else (other[1], d)
+                    self.k = (tame - wild) % order                      # calculate k
                     break
+                elif (w, j) not in following:                           # following one of its own kind,
+                    following.add((w, j))                               # from another process, so move it
+                    nudges[w].put(j)                                    # on, once until it sets a trap
+
+                if self.count > stopAt:                                 # try new jumps
+                    break
+
+            if procs:
+                self.stopWorkers(procs, stop, dps)
 
         self.time = time.time() - self.start
 
-        if fail:
+        if checkpoint is not None:
+            checkpoint.clear()                                          # finished, nothing to resume
+
+        if self.k is None:
             if self.verbose:
                 print("Failed")
 
             self.k = 1
             return 0
 
-        # set space
-        self.space = 20
+        # set space, the jump table, every kangaroo and the traps
+        self.space = 2 * self.r + 2 * kangaroos + 2 * len(traps)
 
         if self.verbose:
             print("k:", self.k)
+            print("Workers:", self.workers)
+            print("Kangaroos:", kangaroos)
+            print("Traps set:", len(traps))
             print("Time taken: %.3f s" % (self.time))                   # print time taken
             print("Space used: %d" % (self.space))                      # print space used
             print("Numbers checked:", self.count)                       # print total count
@@ -173,4 +393,4 @@ if __name__ == '__main__':
 
     s = solver.solve()
     if not s:
-        print("Input not of correct form: python3 pollard_rho.py curve_a curve_b curve_fp G_x G_y Q_x Q_y [verbose]")
+        print("Input not of correct form: python3 pollard_lambda.py curve_a curve_b curve_fp G_x G_y Q_x Q_y [verbose]")
@@ -32,23 +32,477 @@ try:
 except ImportError:
     from utils import secrets
 
+import copy
+import multiprocessing
+import queue
 import time
+import numpy as np
+from ECC import point_array
+from ECC.checkpoint import CHECK_EVERY
 from ECC.curves import *
 from ECC.solver import Solver
-from utils.helper import modInverse
+from utils.helper import gcd, modInverse
+
+
+############ GLOBAL CONSTANTS #########
+
+MAX_FRUITLESS = 12                                                  # longest fruitless cycle escaped
+
+
+############ RANDOM WALK #########
+
+class RAddingWalk:
+    """ Teske's r-adding walk, the partition of a point is picked from the
+        low bits of its x coordinate and each partition adds its own random
+        point aG + bQ, some partitions can instead double the point,
+        with the negation map the walk is on classes {P, -P} instead and
+        given an automorphism psi on classes {+-psi^i(P)} of size 4 or 6,
+        if Q is None every point used is a multiple of G only, so the walk
+        can be shared between several public points with retarget """
+
+    def __init__(self, G, Q, order, r = 20, doublings = 0, negation = False, automorphism = None):
+        self.G = G                                                  # base point
+        self.Q = Q                                                  # public point
+        self.order = order                                          # order of G
+        self.r = r                                                  # number of partitions
+        self.automorphism = automorphism                            # walk on {+-psi^i(P)}
+        self.negation = negation or automorphism is not None        # walk on {P, -P}
+        self.cycleStep = 1 if automorphism else 2                   # lengths of fruitless cycles
+        self.half = G.curve.fp // 2                                 # y above this is negated
+        self.shift = r.bit_length() + 8                             # low bits of x used for partitions
+        self.mask = (1 << self.shift) - 1                           # enough for an even split
+        self.points = []                                            # [P, a, b] per adding partition
+        self.jumps = None                                           # [P, a, b] used to restart walks
+        self.exit = None                                            # (P, a, b) leaving fruitless cycles
+
+        for _ in range(r - doublings):
+            a = secrets.randbelow(order)
+            b = secrets.randbelow(order) if Q is not None else 0
+            P = self.combine(a, b)                                  # linear combination
+            self.points.append([P, a, b])                           # add to list
+
+
+    def combine(self, a, b):
+        """ aG + bQ, or just aG if the walk has no Q """
+
+        if self.Q is None:
+            return mul(self.G, a)
+
+        return mulMulti([self.G, self.Q], [a, b])
+
+
+    def retarget(self, Q):
+        """ a copy of a walk without Q that tracks multiples of Q too, as
+            its points are all multiples of G it moves exactly as the
+            original, so their distinguished points can be compared """
+
+        walk = copy.copy(self)
+        walk.Q = Q
+
+        return walk
+
+
+    def coefficients(self):
+        """ the (a, b) of every partition's point and restart point, which
+            is all that needs saving to rebuild the walk with restore """
+
+        jumps = None if self.jumps is None else [(a, b) for _, a, b in self.jumps]
+
+        return [(a, b) for _, a, b in self.points], jumps
+
+
+    def restore(self, coefficients):
+        """ rebuilds the walk's points from saved coefficients """
+
+        points, jumps = coefficients
+        self.points = [list(self.at(a, b)) for a, b in points]
+        self.jumps = None if jumps is None else [self.at(a, b) for a, b in jumps]
+
+
+    def at(self, a, b):
+        """ the walk state (aG + bQ, a, b), used to rebuild saved states """
+        return self.combine(a, b), a, b
+
+
+    def index(self, P):
+        """ partition of P, using integer operations on x """
+        return (P.x & self.mask) % self.r
+
+
+    def canonical(self, P, a, b):
+        """ representative of the class of P, with the negation map this is
+            whichever of P and -P has the smaller y coordinate, with an
+            automorphism it is picked by Automorphism.canonical """
+
+        if self.automorphism is not None:
+            P, u = self.automorphism.canonical(P)                   # representative = u.P
+
+            if u == 1:
+                return P, a, b
+
+            return P, (u * a) % self.order, (u * b) % self.order
+
+        if self.negation and P.y > self.half:
+            return P.inverted(), (-a) % self.order, (-b) % self.order
+
+        return P, a, b
+
+
+    def start(self):
+        """ a random starting point aG + bQ """
+
+        a = secrets.randbelow(self.order)
+        b = secrets.randbelow(self.order) if self.Q is not None else 0
+
+        return self.canonical(self.combine(a, b), a, b)
+
+
+    def restart(self, P, a, b):
+        """ a new starting point made from an old one by adding one of a
+            few random points, so costing one addition rather than a full
+            multiplication, the points are made the first time it's used """
+
+        if self.jumps is None:
+            self.jumps = [self.start() for _ in range(32)]
+
+        R, c, d = self.jumps[secrets.randbelow(len(self.jumps))]
+
+        return self.canonical(P + R, (a + c) % self.order, (b + d) % self.order)
+
+
+    def step(self, P, a, b, history = None):
+        """ one step of the walk, P = aG + bQ is kept true, with the negation
+            map the walk can fall into fruitless cycles of even length (any
+            length with an automorphism), so if a list is given as history the
+            last few points are kept in it and any such cycle up to length
+            MAX_FRUITLESS is escaped """
+
+        i = self.index(P)
+
+        if i >= len(self.points):                                   # a doubling partition
+            P, a, b = P + P, (2 * a) % self.order, (2 * b) % self.order
+        else:
+            R, c, d = self.points[i]
+            P, a, b = P + R, (a + c) % self.order, (b + d) % self.order
+
+        return self.settle(P, a, b, history)
+
+
+    def stepMany(self, walks, histories):
+        """ one step of every walk in a list of (P, a, b), all the additions
+            share a single inversion using batchAdd, histories has a list
+            (or None) per walk as in step """
+
+        addends = []
+
+        for P, a, b in walks:
+            i = self.index(P)
+            addends.append(self.points[i] if i < len(self.points) else (P, a, b))
+
+        sums = batchAdd([P for P, _, _ in walks], [R for R, _, _ in addends])
+
+        return [self.settle(S, (a + c) % self.order, (b + d) % self.order, history)
+                for S, (_, a, b), (_, c, d), history in zip(sums, walks, addends, histories)]
+
+
+    def settle(self, P, a, b, history):
+        """ finishes a step, moving to the class representative and escaping
+            any fruitless cycle found in the history """
+
+        if not self.negation:
+            return P, a, b
+
+        P, a, b = self.canonical(P, a, b)
+
+        if history is not None:
+            key = P.key()
+            history.append((key, P, a, b))
+
+            longest = min(len(history), MAX_FRUITLESS + 1)
+
+            for t in range(self.cycleStep, longest, self.cycleStep):
+                if history[-1 - t][0] == key:                       # fruitless t-cycle
+                    return self.escape(history, history[-1 - t:-1])
+
+            if len(history) > MAX_FRUITLESS:
+                history.pop(0)
+
+        return P, a, b
+
+
+    def escape(self, history, cycle):
+        """ leaves a fruitless cycle by doubling its smallest point, or
+            adding the exit point to it if the walk has one, every walk
+            stuck in the same cycle leaves it the same way, the point at
+            infinity (key -1) is passed over for the next smallest """
+
+        finite = [point for point in cycle if point[0] >= 0] or cycle
+        _, P, a, b = min(finite, key = lambda point: point[0])
+
+        if self.exit is None:
+            P, a, b = self.canonical(P + P, (2 * a) % self.order, (2 * b) % self.order)
+        else:
+            R, c, d = self.exit
+            P, a, b = self.canonical(P + R, (a + c) % self.order, (b + d) % self.order)
+
+        del history[:]
+        history.append((P.key(), P, a, b))
+
+        return P, a, b
+
+
+    def distinguished(self, P, dpMask):
+        """ if P is a distinguished point, i.e. the bits of x above those
+            used for partitions are zero under the mask """
+        return not (P.x >> self.shift) & dpMask
+
+
+############ DISTINGUISHED POINT WALKS #########
+
+def startStates(walk, walks, starts = None):
+    """ the walks' first states, the saved (a, b) of each if given else
+        random start points """
+
+    if starts:
+        states = [walk.at(a, b) for a, b in starts[:walks]]
+    else:
+        states = [walk.start()]
+
+    while len(states) < walks:
+        states.append(walk.restart(*states[-1]))
+
+    return states
+
+
+def rhoWalks(walk, dpBits, walks = 1, stop = None, starts = None, snapshot = None):
+    """ keeps several random walks from aG + bQ going at once, a step of all
+        of them costing a single inversion, and yields (key, a, b, steps) for
+        every distinguished point reached, steps being the number taken since
+        the last one, a walk is restarted after a distinguished point or if
+        it goes on too long or cycles, until stop is set, the walks begin
+        at starts if given, and whenever snapshot["due"] is set the (a, b)
+        of every walk and the unreported steps are put in snapshot at the
+        end of the round, to be checkpointed """
+
+    if walk.automorphism is None and point_array.supported(walk.G.curve, walks):
+        yield from rhoWalksArray(walk, dpBits, walks, stop, starts, snapshot)
+        return                                                      # vectorised for small fields
+
+    dpMask = (1 << dpBits) - 1
+    maxSteps = 20 << dpBits                                         # 20 times the expected walk length
+    check = max(1, 1024 // walks)                                   # rounds between checks of stop
+    steps = rounds = 0                                              # steps since the last report
+
+    states = startStates(walk, walks, starts)
+    histories = [[] for _ in range(walks)]                          # for fruitless cycles
+    brent = [(X, 1, 1, 0) for X, _, _ in states]                    # saved point, power, lam, length
+
+    while stop is None or rounds % check or not stop.is_set():
+        states = walk.stepMany(states, histories)
+        steps += walks
+        rounds += 1
+
+        for j, (X, a, b) in enumerate(states):
+            Y, power, lam, length = brent[j]
+
+            if walk.distinguished(X, dpMask):
+                yield X.key(), a, b, steps
+                steps = 0
+            elif X != Y and length < maxSteps:                      # Brent's check for other cycles
+                if lam == power:                                    # teleport the saved point
+                    Y, power, lam = X, power * 2, 0
+
+                brent[j] = (Y, power, lam + 1, length + 1)
+                continue
+
+            # two walks that stopped at the same point almost always restart apart
+            states[j] = walk.restart(X, a, b)
+            histories[j] = []
+            brent[j] = (states[j][0], 1, 1, 0)
+
+        if snapshot is not None and snapshot["due"]:
+            snapshot.update(due = False, walks = [(a, b) for _, a, b in states], steps = steps)
+
+
+def rhoWalksArray(walk, dpBits, walks, stop = None, starts = None, snapshot = None):
+    """ rhoWalks for fields under 2^31, the walks are held in a PointArray
+        and every part of a step, including the negation map, fruitless
+        cycles and restarts, is done on all of them at once with NumPy """
+
+    curve, order = walk.G.curve, walk.order
+    dpMask = (1 << dpBits) - 1
+    maxSteps = 20 << dpBits                                         # 20 times the expected walk length
+    check = max(1, 1024 // walks)                                   # rounds between checks of stop
+    steps = rounds = 0                                              # steps since the last report
+    cols = MAX_FRUITLESS + 1                                        # history is a ring of keys per walk
+
+    adding = len(walk.points)                                       # partitions that add a point
+    parts = point_array.fromPoints([P for P, _, _ in walk.points] or [curve.pointAtInf()])
+    partA = np.array([a for _, a, _ in walk.points] or [0], dtype = np.int64)
+    partB = np.array([b for _, _, b in walk.points] or [0], dtype = np.int64)
+
+    if walk.jumps is None:
+        walk.restart(*walk.start())                                 # makes the restart points
+    jumps = point_array.fromPoints([P for P, _, _ in walk.jumps])
+    jumpA = np.array([a for _, a, _ in walk.jumps], dtype = np.int64)
+    jumpB = np.array([b for _, _, b in walk.jumps], dtype = np.int64)
+
+    def canonical(X, A, B, rows):
+        """ moves the selected walks to the representative of {P, -P} """
+
+        if walk.negation:
+            neg = rows[~X.inf[rows] & (X.y[rows] > walk.half)]
+            X.y[neg] = curve.fp - X.y[neg]
+            A[neg] = (order - A[neg]) % order
+            B[neg] = (order - B[neg]) % order
+
+    states = startStates(walk, walks, starts)
+    X = point_array.fromPoints([P for P, _, _ in states])
+    A = np.array([a for _, a, _ in states], dtype = np.int64)
+    B = np.array([b for _, _, b in states], dtype = np.int64)
+
+    everyWalk = np.arange(walks)
+    history = np.full((walks, cols), -2, dtype = np.int64)          # -2 is never a key
+    saved = X.keys()                                                # Brent's saved point per walk
+    power = np.ones(walks, dtype = np.int64)
+    lam = np.ones(walks, dtype = np.int64)
+    length = np.zeros(walks, dtype = np.int64)
+    hx, hy = np.zeros((walks, cols), dtype = np.int64), np.zeros((walks, cols), dtype = np.int64)
+    ha, hb = np.zeros((walks, cols), dtype = np.int64), np.zeros((walks, cols), dtype = np.int64)
+
+    while stop is None or rounds % check or not stop.is_set():
+        ############ STEP EVERY WALK ############
+        i = (X.x & walk.mask) % walk.r                              # partition of every walk
+        add = i < adding
+        j = np.minimum(i, adding - 1) if adding else np.zeros_like(i)
+
+        R = point_array.PointArray(curve, np.where(add, parts.x[j], X.x),
+                                   np.where(add, parts.y[j], X.y),
+                                   np.where(add, parts.inf[j], X.inf))
+        C = np.where(add, partA[j], A)                              # doubling adds the point itself
+        D = np.where(add, partB[j], B)
+
+        X = X + R
+        A = (A + C) % order
+        B = (B + D) % order
+        canonical(X, A, B, everyWalk)
+
+        steps += walks
+        rounds += 1
+        keys = X.keys()
+
+        ############ FRUITLESS CYCLES ############
+        if walk.negation:
+            col = rounds % cols
+            history[:, col] = keys
+            hx[:, col], hy[:, col], ha[:, col], hb[:, col] = X.x, X.y, A, B
+            cycle = np.zeros(walks, dtype = np.int64)                # length of any fruitless cycle
+
+            for t in range(2, cols, 2):
+                cycle[(cycle == 0) & (history[:, (col - t) % cols] == keys)] = t
+
+            stuck = np.nonzero(cycle)[0]
+
+            if len(stuck):                                          # double the smallest point of each
+                best = np.full(len(stuck), -1, dtype = np.int64)
+                bestKey = np.full(len(stuck), 1 << 62, dtype = np.int64)
+
+                for t in range(1, cols):
+                    back = (col - t) % cols
+                    key = history[stuck, back]                      # infinity (-1) is never picked
+                    candidate = (t <= cycle[stuck]) & (key >= 0) & (key < bestKey)
+                    best[candidate] = back
+                    bestKey[candidate] = key[candidate]
+
+                length[stuck[best < 0]] = maxSteps                  # only infinity, so restart instead
+                stuck = stuck[best >= 0]
+                best = best[best >= 0]
+
+                M = point_array.PointArray(curve, hx[stuck, best], hy[stuck, best])
+                X[stuck] = M.double()
+                A[stuck] = (2 * ha[stuck, best]) % order
+                B[stuck] = (2 * hb[stuck, best]) % order
+                canonical(X, A, B, stuck)
+
+                keys = X.keys()
+                history[stuck] = -2
+                history[stuck, col] = keys[stuck]
+                hx[stuck, col], hy[stuck, col] = X.x[stuck], X.y[stuck]
+                ha[stuck, col], hb[stuck, col] = A[stuck], B[stuck]
+
+        ############ DISTINGUISHED POINTS AND RESTARTS ############
+        dist = ((X.x >> walk.shift) & dpMask) == 0
+
+        for w in np.nonzero(dist)[0]:
+            yield int(keys[w]), int(A[w]), int(B[w]), steps
+            steps = 0
+
+        restart = np.nonzero(dist | (keys == saved) | (length >= maxSteps))[0]
+        teleport = lam == power                                     # Brent's check for other cycles
+        saved = np.where(teleport, keys, saved)
+        power = np.where(teleport, power * 2, power)
+        lam = np.where(teleport, 1, lam + 1)
+        length += 1
+
+        if len(restart):                                            # add a random jump point
+            pick = np.array([secrets.randbelow(len(walk.jumps)) for _ in restart], dtype = np.int64)
+            X[restart] = X[restart] + jumps[pick]
+            A[restart] = (A[restart] + jumpA[pick]) % order
+            B[restart] = (B[restart] + jumpB[pick]) % order
+            canonical(X, A, B, restart)
+
+            history[restart] = -2
+            saved[restart] = X[restart].keys()
+            power[restart], lam[restart], length[restart] = 1, 1, 0
+
+        if snapshot is not None and snapshot["due"]:
+            snapshot.update(due = False, walks = list(zip(A.tolist(), B.tolist())), steps = steps)
+
+
+############ PARALLEL WORKER #########
+
+def rhoWorker(walk, dpBits, stop, dps, walks = 1):
+    """ one of several processes, it reports each distinguished point its
+        walks reach to the coordinator until told to stop """
+
+    for dp in rhoWalks(walk, dpBits, walks, stop):
+        dps.put(dp)
 
 
 ############ EXTRA FUNCTIONS #########
 
-def g(arr, n, points):
-    """ polynomial function for semi-randomness """
-    P, a, b = arr                                                   # extract
-    xCoord = P.x                                                    # extract x coord
-    xCoord = bin(P.x)                                               # get binary representation
-    xCoord = "0" * 4 + xCoord[2:]                                   # pad front with 0's
-    ind = int(xCoord[-4:], 2)                                       # get random point by "hashing P"
-    Q = points[ind]                                                 # extract random point
-    return P + Q[0], (a + Q[1]) % n, (b + Q[2]) % n                 # return the addition
+def received(dps, procs):
+    """ yields the distinguished points sent by the workers until they
+        have all exited """
+
+    while True:
+        try:
+            yield dps.get(timeout = 0.1)
+        except queue.Empty:
+            if not any(proc.is_alive() for proc in procs):
+                return
+
+def solveCollision(G, Q, order, a1, b1, a2, b2, maxCandidates = 1024):
+    """ given a1G + b1Q = a2G + b2Q returns k with Q = kG, or None,
+        if b2 - b1 shares a factor d with the order there are d candidates
+        which are checked as long as there aren't too many """
+
+    db = (b2 - b1) % order
+    da = (a1 - a2) % order                                          # da = db.k mod order
+    d = gcd(db, order)
+
+    if db == 0 or da % d != 0 or d > maxCandidates:                 # useless collision
+        return None
+
+    reduced = order // d
+    k = ((da // d) * modInverse((db // d) % reduced, reduced)) % reduced
+
+    for _ in range(d):                                              # k + t.order/d for 0 <= t < d
+        if mul(G, k) == Q:
+            return k
+        k += reduced
+
+    return None
 
 
 ############ MAIN CODE #########
@@ -56,7 +510,60 @@ def g(arr, n, points):
 class PRSolver(Solver):
     """ inherits from the default solver Class """
 
-    def solve(self):
+    def __init__(self, C = None, Q = None, G = None, v = True):
+        super(PRSolver, self).__init__(C, Q, G, v)
+        self.r = 20                                                 # partitions in the walk
+        self.doublings = 0                                          # of which are doubling steps
+        self.workers = 1                                            # processes to use
+        self.dpBits = None                                          # zero bits of a distinguished point
+        self.negation = False                                       # walk on classes {P, -P}
+        self.automorphism = False                                   # walk on classes {+-psi^i(P)}
+        self.walks = 1                                              # walks advanced together per process
+
+
+    def setPartitions(self, r):
+        """ sets the number of partitions in the r-adding walk """
+        self.r = r
+
+    def setDoublings(self, doublings):
+        """ sets how many of the partitions double the point instead """
+        self.doublings = doublings
+
+    def setWorkers(self, workers):
+        """ sets how many processes walk in parallel """
+        self.workers = workers
+
+    def setNegation(self, negation):
+        """ walks on classes {P, -P} for a theoretical sqrt(2) speedup """
+        self.negation = negation
+
+    def setAutomorphism(self, automorphism):
+        """ on j = 0 or 1728 curves walks on classes {+-psi^i(P)} of size 6
+            or 4, for up to a sqrt(6) speedup, else falls back to negation """
+        self.automorphism = automorphism
+
+    def setWalks(self, walks):
+        """ sets how many walks each process advances together, with one
+            inversion per step of all of them, more than one uses
+            distinguished points even in a single process """
+        self.walks = walks
+
+    def setDistinguishedBits(self, bits):
+        """ a point is distinguished if this many bits of x are zero, so
+            one in 2^bits points is stored, None picks it from the order """
+        self.dpBits = bits
+
+
+    def newWalk(self, order):
+        """ a new random r-adding walk with the chosen options """
+
+        auto = self.curve.automorphism(self.G, order) if self.automorphism else None
+
+        return RAddingWalk(self.G, self.Q, order, self.r, self.doublings,
+                           self.negation or self.automorphism, auto)
+
+
+    def solve(self, order = False):
         """ creates random smaller cycles using the birthday-paradox to
             probabilistically find a solution """
 
@@ -68,52 +575,68 @@ class PRSolver(Solver):
         self.count = 1                                              # initial count
         self.start = time.time()
 
-        order = self.curve.order(self.G)                            # get order of generator
+        if not order:                                               # if order not yet set
+            order = self.curve.order(self.G)                        # get order of generator
+
+        self.k = None
 
-        ############ POLLARD'S RHO + FLOYD'S EXTENSION ############
-        found = False
+        if self.workers > 1 or self.walks > 1:
+            return self.solveParallel(order)
 
-        # will probably find a factor, so need to loop with random numbers until we find it
-        while not found:
+        checkpoint = self.checkpoint("rho")
+        state = self.resumeState(checkpoint)
 
-            ############ GENERATE RANDOM FUNCTION POINTS ############
-            points = []                                                 # list of points to inform our random function
+        ############ POLLARD'S RHO + BRENT'S CYCLE DETECTION ############
 
-            for _ in range(17):
-                a = secrets.randbelow(order)
-                b = secrets.randbelow(order)
-                P = (self.G * a) + (self.Q * b)                         # linear combination
-                points.append([P, a, b])                                # add to list
+        # will probably find a useless collision, so need to loop with random walks until we find it
+        while self.k is None:
+            walk = self.newWalk(order)
 
-            ############ RANDOM START POINTS ############
-            Y, aY, bY = X, aX, bX = points.pop()                        # random starting points
+            if state is not None:                                   # carry on the saved walk
+                walk.restore(state["walk"])
+                X, aX, bX = walk.at(*state["X"])
+                Y, aY, bY = walk.at(*state["Y"])
+                power, lam = state["power"], state["lam"]
+                self.count = state["count"]
+                self.start -= state["time"]
+                state = None
+            else:
+                ############ RANDOM START POINT ############
+                X, aX, bX = walk.start()
 
-            ############ FLOYD'S CYCLE DETECTION ############
-            while not found:
-                X, aX, bX = g((X, aX, bX), order, points)               # first runner
-                Y, aY, bY = g(g((Y,aY,bY),order,points),order,points)   # second runner
+                Y, aY, bY = X, aX, bX                               # saved point
+                power = lam = 1                                     # Y is replaced at powers of 2
 
-                found = X == Y                                          # detect match
-                self.count += 1                                         # increment count
+            history = []                                            # for fruitless cycles
 
-            if bX == bY and aX == aY:                                   # if we arrive at identical combinations
-                found = False                                           # reset and try again
-            else:
-                inv = modInverse((bX - bY) % order, order)              # get mod inverse
+            ############ BRENT'S CYCLE DETECTION ############
+            while True:
+                X, aX, bX = walk.step(X, aX, bX, history)           # one step a time, rather than three
+                self.count += 1                                     # increment count
+
+                if X == Y:                                          # detect match
+                    self.k = solveCollision(self.G, self.Q, order, aX, bX, aY, bY)
+                    break
+
+                if lam == power:                                    # teleport the saved point
+                    Y, aY, bY = X, aX, bX
+                    power *= 2
+                    lam = 0
 
-                if inv == 0:                                            # if no mod inverse exists
-                    found = False                                       # need to randomly try again
-                else:                                                   # we have found k
-                    self.k = ((aY - aX) * inv) % order                  # so set it
+                lam += 1
 
-                    if self.G * self.k != self.Q:                       # not always 100% going to work
-                        print("error")
-                        found = True
+                if checkpoint is not None and not self.count % CHECK_EVERY and checkpoint.due():
+                    checkpoint.save({"walk": walk.coefficients(), "X": (aX, bX), "Y": (aY, bY),
+                                     "power": power, "lam": lam, "count": self.count,
+                                     "time": time.time() - self.start})
+
+        if checkpoint is not None:
+            checkpoint.clear()                                      # solved, nothing to resume
 
         self.time = time.time() - self.start
 
-        # set space
-        self.space = 18
+        # set space, the walk's points and the saved point
+        self.space = 3 * self.r + 3
 
         if self.verbose:
             print("k:", self.k)
@@ -124,6 +647,101 @@ class PRSolver(Solver):
         return True
 
 
+    def solveParallel(self, order):
+        """ van Oorschot-Wiener parallel rho, every walk uses the same
+            r-adding walk and reports distinguished points, when two walks
+            reach the same one they have collided and k can be found, the
+            walks are shared between worker processes, or with one worker
+            they are all advanced together in this process, if checkpointing
+            the distinguished points are saved, and with one worker the
+            state of every walk too, other workers restart their walks """
+
+        dpBits = self.dpBits
+        if dpBits is None:                                          # about sqrt(order) / 32 steps per point
+            least = 0 if self.walks == 1 else 3                     # reporting points isn't free
+            dpBits = max(least, order.bit_length() // 2 - 5 - (self.walks - 1).bit_length())
+
+        checkpoint = self.checkpoint("rho_dp")
+        state = self.resumeState(checkpoint)
+        walk = self.newWalk(order)
+        table = {}                                                  # distinguished point -> (a, b)
+        starts = None
+
+        if state is not None:                                       # the same walk and points
+            walk.restore(state["walk"])
+            dpBits, table, starts = state["dpBits"], state["table"], state["walks"]
+            self.count = state["count"]
+            self.start -= state["time"]
+
+        snapshot = {"due": False}                                   # walk states to checkpoint
+        procs = []
+
+        if self.workers == 1:                                       # every walk in this process
+            source = rhoWalks(walk, dpBits, self.walks, None, starts, snapshot)
+        else:
+            stop = multiprocessing.Event()
+            dps = multiprocessing.Queue()
+
+            procs = [multiprocessing.Process(target = rhoWorker,
+                                             args = (walk, dpBits, stop, dps, self.walks))
+                     for _ in range(self.workers)]
+
+            for proc in procs:
+                proc.start()
+
+            source = received(dps, procs)
+
+        for key, a, b, steps in source:
+            if checkpoint is not None and ("walks" in snapshot or procs and checkpoint.due()):
+                checkpoint.save({"walk": walk.coefficients(), "dpBits": dpBits, "table": table,
+                                 "walks": snapshot.pop("walks", None),
+                                 "count": self.count + snapshot.pop("steps", 0),
+                                 "time": time.time() - self.start})
+            elif checkpoint is not None and checkpoint.due():
+                snapshot["due"] = True                              # saved once the walks next report
+
+            self.count += steps                                     # increment count
+
+            if key in table:                                        # two walks have met
+                a2, b2 = table[key]
+                self.k = solveCollision(self.G, self.Q, order, a, b, a2, b2)
+
+                if self.k is not None:
+                    break
+            else:
+                table[key] = (a, b)
+
+        if not procs:
+            return self.finishParallel(table, checkpoint)
+
+        self.stopWorkers(procs, stop, dps)                          # cancel the other workers
+
+        return self.finishParallel(table, checkpoint)
+
+
+    def finishParallel(self, table, checkpoint = None):
+        """ records the time and space used by solveParallel """
+
+        if checkpoint is not None and self.k is not None:
+            checkpoint.clear()                                      # solved, nothing to resume
+
+        self.time = time.time() - self.start
+
+        # set space, the walk's points, every walk's point and the distinguished points
+        self.space = 3 * self.r + 3 * self.workers * self.walks + 3 * len(table)
+
+        if self.verbose:
+            print("k:", self.k)
+            print("Workers:", self.workers)
+            print("Walks per worker:", self.walks)
+            print("Distinguished points:", len(table))
+            print("Time taken: %.3f s" % (self.time))                   # print time taken
+            print("Space used: %d" % (self.space))                      # print space used
+            print("Numbers checked:", self.count)                       # print total count
+
+        return self.k is not None
+
+
 ############ COMMAND LINE INTERFACE #########
 
 if __name__ == '__main__':
@@ -24,6 +24,9 @@ sys.path.append('Programming/')
 if not __package__:
     sys.path.append('../')
 
+import os
+import queue
+from ECC.checkpoint import Checkpoint, problemName
 from ECC.generate_ECC import KeyGen
 
 
@@ -43,3 +46,66 @@ class Solver(KeyGen):
         self.start = 0                                      # for timing
         self.time = 0
         self.space = 1                                      # constant space
+        self.jacobian = False                               # walk in Jacobian coordinates
+        self.checkpointDir = None                           # where long runs save their state
+        self.checkpointInterval = 60                        # seconds between saves
+        self.resume = False                                 # continue from a saved state
+
+
+    def setJacobian(self, jacobian):
+        """ opts in to inversion-free Jacobian point arithmetic """
+        self.jacobian = jacobian
+
+
+    def setCheckpoint(self, directory, interval = 60):
+        """ periodically saves the state of long runs to the directory,
+            None turns checkpointing off """
+        self.checkpointDir = directory
+        self.checkpointInterval = interval
+
+
+    def setResume(self, resume):
+        """ continues from the saved state for the same key, if there is one """
+        self.resume = resume
+
+
+    def checkpoint(self, name):
+        """ the Checkpoint for this solver and key, or None if not checkpointing """
+
+        if self.checkpointDir is None:
+            return None
+
+        path = os.path.join(self.checkpointDir, problemName(name, self.curve, self.G, self.Q))
+
+        return Checkpoint(path, self.checkpointInterval)
+
+
+    def stopWorkers(self, procs, stop, dps):
+        """ cancels the worker processes once k is found, counting the
+            steps (the fourth item) of the points they report while
+            stopping, so they aren't blocked on a full queue """
+
+        stop.set()
+
+        while any(proc.is_alive() for proc in procs):               # empty the queue so they can exit
+            try:
+                self.count += dps.get(timeout = 0.05)[3]
+            except queue.Empty:
+                pass
+
+        for proc in procs:
+            proc.join()
+
+
+    def resumeState(self, checkpoint):
+        """ the saved state to continue from, or None to start afresh """
+
+        if checkpoint is None or not self.resume:
+            return None
+
+        state = checkpoint.load()
+
+        if state is not None and self.verbose:
+            print("Resuming from", checkpoint.path)
+
+        return state
@@ -0,0 +1,134 @@
+#
+#    File: table_lookup.py
+#    Author: Alexander Craig
+#    Project: An Analysis of the Security of RSA & Elliptic Curve Cryptography
+#    Supervisor: Maximilien Gadouleau
+#    Version: 1.0
+#    Date: 18/10/26
+#
+#    Functionality: caclualtes a private ECC key from a given public key set
+#                   on a tiny curve by looking it up in a complete table of
+#                   the logs of every multiple of the base point
+#
+#    Instructions: intended use is to import this file and use the Class as defined
+#
+#    Notes: the table is built once per curve and base point, then kept in
+#           a LogTableCache (on disk too if it has a directory), so every
+#           later key on the same curve is answered with one lookup
+#
+#    CLI: for testing can be used from command line -
+#           python3 table_lookup.py curve_a curve_b curve_fp G_x G_y Q_x Q_y [verbose]
+#           for base-point G and public-point Q
+#
+
+############ IMPORTS #########
+
+# needed for pydocs to correctly find everything
+import sys
+sys.path.append('Programming/')
+
+# allows me to run this file directly, i.e. not wrapped up in the package
+if not __package__:
+    sys.path.append('../')
+
+import time
+from ECC.curves import *
+from ECC.solver import Solver
+from ECC.tables import MAX_LOG_FIELD, buildLogTable, logCache
+
+############ MAIN CODE #########
+
+class TLSolver(Solver):
+    """ inherits from the default solver Class """
+
+    def __init__(self, C = None, Q = None, G = None, v = True):
+        super(TLSolver, self).__init__(C, Q, G, v)
+        self.cache = logCache                                       # reuses tables between keys
+
+
+    def setCache(self, cache):
+        """ sets the LogTableCache tables are kept in, None to rebuild every time """
+        self.cache = cache
+
+
+    def solve(self, order = False):
+        """ looks Q up in the table of every multiple of G, building the
+            table first if this curve and base point haven't been seen """
+
+        # sanity check
+        if self.G is None or self.curve is None or self.Q is None:
+            print("Can't solve not all parameters are set")
+            return False                                            # unsuccessful
+
+        if self.curve.fp >= MAX_LOG_FIELD:
+            print("Curve too large for a complete table")
+            return False                                            # unsuccessful
+
+        ############ FIND MULTIPLIER #########
+        self.count = 1                                              # initial count
+        self.start = time.time()
+
+        if not order:                                               # if order not yet set
+            order = self.curve.order(self.G)                        # get order of base point
+
+        cacheKey = (self.curve.a, self.curve.b, self.curve.fp, self.G.key(), order)
+        cached = self.cache.get(cacheKey) if self.cache is not None else None
+
+        if cached is not None:
+            table = cached[0]
+        else:
+            table = buildLogTable(self.G, order)                    # every multiple up to order / 2
+            self.count += order // 2                                # increment count
+
+            if self.cache is not None:
+                self.cache.put(cacheKey, (table, order))
+
+        k = table.lookup(self.Q)
+
+        if k is None:
+            # sanity check
+            if self.verbose:
+                print ("Point not found")
+
+            return 0
+
+        self.k = k
+        self.time = time.time() - self.start
+
+        # set space, one entry per x coordinate
+        self.space = len(table)
+
+        if self.verbose:
+            print("k:", self.k)
+            print("Time taken: %.3f s" % (self.time))               # print time taken
+            print("Space used: %d" % (self.space))                  # print space used
+            print("Numbers checked:", self.count)                   # print total count
+
+        return True
+
+
+############ COMMAND LINE INTERFACE #########
+
+if __name__ == '__main__':
+    solver = TLSolver()
+
+    if len(sys.argv) >= 8:
+        c_a = int(sys.argv[1])
+        c_b = int(sys.argv[2])
+        c_fp = int(sys.argv[3])
+        G_x = int(sys.argv[4])
+        G_y = int(sys.argv[5])
+        Q_x = int(sys.argv[6])
+        Q_y = int(sys.argv[7])
+        C = Curve(c_a, c_b, c_fp)
+        G = Point(G_x, G_y, C)
+        Q = Point(Q_x, Q_y, C)
+        solver.setCurve(C)
+        solver.setG(G)
+        solver.setQ(Q)
+    if len(sys.argv) == 9:
+        solver.setVerbose(int(sys.argv[8]))
+
+    s = solver.solve()
+    if not s:
+        print("Input not of correct form: python3 table_lookup.py curve_a curve_b curve_fp G_x G_y Q_x Q_y [verbose]")
@@ -0,0 +1,461 @@
+#
+#    File: tables.py
+#    Author: Alexander Craig
+#    Project: An Analysis of the Security of RSA & Elliptic Curve Cryptography
+#    Supervisor: Maximilien Gadouleau
+#    Version: 1.0
+#    Date: 18/10/26
+#
+#    Functionality: memory efficient lookup tables from points to the
+#                   multiplier that produced them, for use by the solvers
+#
+#    Instructions: intended use is to import this file as a module and to
+#                  use the classes as defined
+#
+#    Notes: points are stored by a 64-bit fingerprint of Point.key(), which is
+#           exact for fields under 2^63, so any match must still be verified
+#           against the curve by the caller, tables too big for memory are kept
+#           on disk as sorted memory-mapped runs and searched in batches,
+#           finished tables can be cached and reused for later keys,
+#           on tiny curves a LogTable holds the log of every point, and a
+#           DPTable keeps the distinguished points of rho walks between keys
+#
+
+############ IMPORTS #########
+
+# needed for pydocs to correctly find everything
+import sys
+sys.path.append('Programming/')
+
+# allows me to run this file directly, i.e. not wrapped up in the package
+if not __package__:
+    sys.path.append('../')
+
+import os
+import pickle
+import shutil
+import tempfile
+import numpy as np
+from collections import OrderedDict
+from ECC import point_array
+from ECC.curves import mul
+
+
+############ GLOBAL CONSTANTS #########
+
+MASK64 = (1 << 64) - 1                                                  # fingerprints are 64 bits
+GOLDEN = 0x9E3779B97F4A7C15                                             # multiplicative hashing constant
+EMPTY = 0xFFFFFFFF                                                      # marks an unused slot
+MAX_LOG_FIELD = 1 << 24                                                 # largest field given a LogTable
+
+
+############ EXTRA FUNCTIONS #########
+
+def fingerprint(key):
+    """ reduces a point key to an unsigned 64-bit fingerprint """
+    return key & MASK64
+
+
+############ COMPACT TABLE CLASS #########
+
+class CompactTable:
+    """ open addressing hash table from point fingerprints to indices,
+        stored in two preallocated NumPy arrays (12 bytes a slot) rather
+        than a dictionary of Python objects """
+
+    def __init__(self, entries, load = 0.5):
+        bits = max(int(entries / load), 1).bit_length()                 # power of two size for masking
+        self.size = 1 << bits
+        self.shift = 64 - bits                                          # keeps top bits of the hash
+        self.mask = self.size - 1
+        self.entries = 0                                                # number of stored items
+        self.fingerprints = np.zeros(self.size, dtype = np.uint64)
+        self.indices = np.full(self.size, EMPTY, dtype = np.uint32)
+
+
+    def __len__(self):
+        """ number of stored items """
+        return self.entries
+
+
+    def slot(self, f):
+        """ initial slot for a fingerprint """
+        return ((f * GOLDEN) & MASK64) >> self.shift
+
+
+    def insert(self, key, n):
+        """ stores n against a point key, using linear probing """
+
+        if self.entries >= self.size - 1:                               # always leave an empty slot
+            print("Compact table is full")
+            return False
+
+        f = fingerprint(key)
+        s = self.slot(f)
+
+        while self.indices[s] != EMPTY:                                 # find next free slot
+            s = (s + 1) & self.mask
+
+        self.fingerprints[s] = f
+        self.indices[s] = n
+        self.entries += 1
+
+        return True
+
+
+    def get(self, key):
+        """ returns every stored index whose fingerprint matches the key,
+            normally zero or one, the caller verifies which is correct """
+
+        f = fingerprint(key)
+        s = self.slot(f)
+        matches = []
+
+        while self.indices[s] != EMPTY:                                 # probe until an empty slot
+            if self.fingerprints[s] == f:
+                matches.append(int(self.indices[s]))
+
+            s = (s + 1) & self.mask
+
+        return matches
+
+
+    def nbytes(self):
+        """ memory used by the table in bytes """
+        return self.fingerprints.nbytes + self.indices.nbytes
+
+
+############ SORTED RUNS CLASS #########
+
+class SortedRuns:
+    """ a table made of several runs, each a pair of arrays sorted by
+        fingerprint, looked up in batches using binary search """
+
+    def __init__(self):
+        self.runs = []                                                  # list of (fingerprints, indices)
+        self.entries = 0                                                # number of stored items
+
+
+    def __len__(self):
+        """ number of stored items """
+        return self.entries
+
+
+    def addRun(self, fingerprints, indices):
+        """ adds an already sorted run """
+        self.runs.append((fingerprints, indices))
+        self.entries += len(fingerprints)
+
+
+    def lookup(self, keys):
+        """ given a batch of point keys returns a list of (position, index)
+            for every fingerprint match, position being where in the batch
+            the key was, the caller verifies which are correct """
+
+        fps = np.array([fingerprint(key) for key in keys], dtype = np.uint64)
+        matches = []
+
+        for runFps, runIndices in self.runs:
+            lo = np.searchsorted(runFps, fps, side = "left")           # binary search the whole batch
+            hi = np.searchsorted(runFps, fps, side = "right")
+
+            for pos in np.nonzero(hi > lo)[0]:                          # only keys present in this run
+                for j in range(lo[pos], hi[pos]):
+                    matches.append((int(pos), int(runIndices[j])))
+
+        return sorted(matches)
+
+
+############ DISK TABLE CLASS #########
+
+class DiskTable(SortedRuns):
+    """ a table too large for memory, items are buffered then written as
+        sorted memory-mapped runs to a temporary directory """
+
+    def __init__(self, entries, directory = None, runEntries = 1 << 22):
+        super(DiskTable, self).__init__()
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok = True)
+
+        self.path = tempfile.mkdtemp(prefix = "bsgs_", dir = directory) # where the runs are kept
+        self.runEntries = min(runEntries, max(entries, 1))              # items per run
+        self.indexType = np.uint32 if entries < EMPTY else np.uint64    # smallest index that fits
+        self.bufferFps = np.zeros(self.runEntries, dtype = np.uint64)   # current run being filled
+        self.bufferIndices = np.zeros(self.runEntries, dtype = self.indexType)
+        self.buffered = 0
+
+
+    def insert(self, key, n):
+        """ buffers n against a point key, writing a run once full """
+
+        self.bufferFps[self.buffered] = fingerprint(key)
+        self.bufferIndices[self.buffered] = n
+        self.buffered += 1
+
+        if self.buffered == self.runEntries:
+            self.flush()
+
+        return True
+
+
+    def flush(self):
+        """ sorts the buffer and writes it to disk as a memory-mapped run """
+
+        if not self.buffered:
+            return
+
+        order = np.argsort(self.bufferFps[:self.buffered], kind = "stable")
+        name = os.path.join(self.path, "run%d" % len(self.runs))
+
+        for suffix, data in (("_fp.npy", self.bufferFps), ("_ind.npy", self.bufferIndices)):
+            out = np.lib.format.open_memmap(name + suffix, mode = "w+",
+                                            dtype = data.dtype, shape = (self.buffered,))
+            out[:] = data[:self.buffered][order]                        # write sorted run
+            out.flush()
+            del out
+
+        self.addRun(np.load(name + "_fp.npy", mmap_mode = "r"),         # reopen read only
+                    np.load(name + "_ind.npy", mmap_mode = "r"))
+        self.buffered = 0
+
+
+    def close(self):
+        """ removes the runs from disk """
+
+        self.runs = []
+        shutil.rmtree(self.path, ignore_errors = True)
+
+
+############ TABLE CACHE CLASS #########
+
+class TableCache:
+    """ keeps recently built tables so solving another key on the same
+        curve and base point can skip building them, least recently used
+        tables are evicted once the total number of entries is too large,
+        if a directory is given tables are also saved there and reloaded """
+
+    def __init__(self, maxEntries = 1 << 20, directory = None):
+        self.maxEntries = maxEntries                                    # total entries held in memory
+        self.directory = directory                                      # where to persist tables
+        self.tables = OrderedDict()                                     # key -> (table, extra)
+        self.entries = 0
+
+
+    def setDirectory(self, directory):
+        """ sets where tables are persisted, None keeps them in memory only """
+        self.directory = directory
+
+
+    def fileName(self, key):
+        """ the file a table is persisted to """
+        return os.path.join(self.directory, "table_" + "_".join(str(k) for k in key) + ".pkl")
+
+
+    def get(self, key):
+        """ returns the cached (table, extra) for the key, or None """
+
+        if key in self.tables:
+            self.tables.move_to_end(key)                                # mark as recently used
+            return self.tables[key]
+
+        if self.directory is not None and os.path.exists(self.fileName(key)):
+            value = self.load(key)                                      # reload persisted table
+            self.put(key, value, False)
+            return value
+
+        return None
+
+
+    def load(self, key):
+        """ reads a persisted (table, extra) """
+
+        with open(self.fileName(key), "rb") as f:
+            return pickle.load(f)
+
+
+    def save(self, key, value):
+        """ persists (table, extra) """
+
+        with open(self.fileName(key) + ".tmp", "wb") as f:              # write then rename so a
+            pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)              # half written file is never read
+
+        os.replace(self.fileName(key) + ".tmp", self.fileName(key))
+
+
+    def put(self, key, value, save = True):
+        """ caches (table, extra) under the key, evicting old tables, a
+            table larger than the whole cache is only persisted """
+
+        if key in self.tables:
+            return
+
+        if len(value[0]) <= self.maxEntries:                            # would never fit, so don't hold it
+            self.tables[key] = value
+            self.entries += len(value[0])
+            self.evict()
+
+        if save and self.directory is not None:
+            os.makedirs(self.directory, exist_ok = True)
+            self.save(key, value)
+
+
+    def grow(self, key, added):
+        """ records that the cached table for the key gained entries,
+            persisting it again """
+
+        if key not in self.tables:
+            return
+
+        self.entries += added
+        value = self.tables[key]
+
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok = True)
+            self.save(key, value)
+
+        self.tables.move_to_end(key)                                    # mark as recently used
+        self.evict()                                                    # may now be too large itself
+
+
+    def evict(self):
+        """ drops least recently used tables until the entries fit """
+
+        while self.entries > self.maxEntries and self.tables:
+            _, (old, _) = self.tables.popitem(last = False)
+            self.entries -= len(old)
+
+
+    def clear(self):
+        """ empties the in memory cache """
+        self.tables = OrderedDict()
+        self.entries = 0
+
+
+############ LOG TABLE CLASS #########
+
+class LogTable:
+    """ the discrete log of every point generated by G, indexed by x
+        coordinate, entry x is the k with kG = (x, y) for the y that is
+        even, the other point (x, -y) is then (order - k)G, an entry of
+        0 means no point with that x is a multiple of G """
+
+    def __init__(self, logs, order):
+        self.logs = logs                                                # array of logs by x
+        self.order = order                                              # order of G
+
+
+    def __len__(self):
+        """ number of entries """
+        return len(self.logs)
+
+
+    def lookup(self, P):
+        """ returns k with P = kG, or None if P isn't a multiple of G """
+
+        if P.inf:
+            return 0
+
+        if P.x >= len(self.logs) or not self.logs[P.x]:
+            return None
+
+        k = int(self.logs[P.x])
+
+        return self.order - k if P.y & 1 else k                         # odd y is the negated point
+
+
+def buildLogTable(G, order, lanes = 1024):
+    """ builds the LogTable for G, only the multiples up to order / 2 are
+        found as the rest are their negatives, these are split into lanes
+        of consecutive multiples advanced together in a PointArray """
+
+    logs = np.zeros(G.curve.fp, dtype = np.uint32)
+    half = order // 2
+    lanes = max(1, min(lanes, half))
+    span = (half + lanes - 1) // lanes                                  # multiples per lane
+
+    starts = np.arange(1, half + 1, span, dtype = np.int64)
+    points = point_array.fromPoints([mul(G, int(k)) for k in starts])   # first multiple in each lane
+
+    for j in range(span):
+        live = starts + j <= half                                       # the last lane can be shorter
+        live &= ~points.inf
+        k = starts + j
+
+        logs[points.x[live]] = np.where(points.y[live] & 1, order - k[live], k[live])
+
+        points = points + G                                             # next multiple in every lane
+
+    return LogTable(logs, order)
+
+
+############ LOG TABLE CACHE CLASS #########
+
+class LogTableCache(TableCache):
+    """ a TableCache of LogTables, keyed by (a, b, fp, G, order), which are
+        saved as .npy files and reloaded memory-mapped, so only the pages
+        that are looked up are read from disk """
+
+    def fileName(self, key):
+        """ the file a table is persisted to """
+        return os.path.join(self.directory, "logs_" + "_".join(str(k) for k in key) + ".npy")
+
+
+    def load(self, key):
+        """ maps a persisted table into memory """
+
+        table = LogTable(np.load(self.fileName(key), mmap_mode = "r"), key[-1])
+
+        return (table, key[-1])
+
+
+    def save(self, key, value):
+        """ persists the table's logs """
+
+        with open(self.fileName(key) + ".tmp", "wb") as f:              # write then rename so a
+            np.save(f, value[0].logs)                                   # half written file is never read
+
+        os.replace(self.fileName(key) + ".tmp", self.fileName(key))
+
+
+############ DP TABLE CLASS #########
+
+class DPTable:
+    """ distinguished points of rho walks on multiples of G with their
+        known logs, along with the (a, b) of the walk's points, as a
+        different walk would reach different distinguished points """
+
+    def __init__(self, walk, dpBits, order):
+        self.walk = walk                                                # walk.coefficients()
+        self.dpBits = dpBits                                            # zero bits of a distinguished point
+        self.order = order                                              # order of G
+        self.logs = {}                                                  # point key -> log
+        self.steps = 0                                                  # steps spent finding them
+
+
+    def __len__(self):
+        """ number of entries """
+        return len(self.logs)
+
+
+    def add(self, key, log):
+        """ stores a distinguished point and its log, returns whether it's new """
+
+        if key in self.logs:
+            return False
+
+        self.logs[key] = log % self.order
+
+        return True
+
+
+    def get(self, key):
+        """ the log of a distinguished point, or None """
+        return self.logs.get(key)
+
+
+############ GLOBAL CACHE #########
+
+bsgsCache = TableCache()                                                # shared by BGSolvers given it
+logCache = LogTableCache(MAX_LOG_FIELD * 4)                             # shared by every TLSolver
+dpCache = TableCache()                                                  # shared by every MRSolver
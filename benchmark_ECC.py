@@ -0,0 +1,353 @@
+#
+#    File: benchmark_ECC.py
+#    Author: Alexander Craig
+#    Project: An Analysis of the Security of RSA & Elliptic Curve Cryptography
+#    Supervisor: Maximilien Gadouleau
+#    Version: 1.0
+#    Date: 18/10/26
+#
+#    Functionality: benchmarks the building blocks of the ECC code, so that
+#                   different implementations can be compared on the same keys
+#
+#    CLI: python3 benchmark_ECC.py -h (to see possible flags)
+#
+
+############ IMPORTS #########
+
+# needed for pydocs to correctly find everything
+import sys
+sys.path.append('Programming/')
+
+# to make it backwards compatable with Python < 3.6
+try:
+    import secrets
+except ImportError:
+    from utils import secrets
+
+import argparse
+import time
+from ECC import baby_step, gaudry_schost, generate_ECC, multi_rho, pollard_lambda, pollard_rho
+from ECC.curves import mul, mulMulti, MUL_METHODS
+
+
+############ FUNCTIONS #########
+
+def getKeys(bits, special = False):
+    """ generates a curve and key pair to benchmark against, if special the
+        curve has j = 0 or 1728 and an automorphism on the subgroup of G """
+
+    keys = generate_ECC.KeyGen(bits, False)                                     # initialise keys
+    keys.generateCurve()                                                        # get curve paramaters
+
+    while special and keys.curve.automorphism(keys.G) is None:                  # try again
+        keys.generateCurve()
+
+    keys.generateKeys()                                                         # generate keys
+
+    return keys
+
+
+def benchMul(bits = 32, trials = 100, w = None, special = False):
+    """ compares the scalar multiplication methods, printing the average
+        number of additions, doublings and time per multiplication """
+
+    keys = getKeys(bits, special)
+    order = keys.curve.ord
+    scalars = [secrets.randbelow(order) for _ in range(trials)]                 # same scalars for every method
+
+    print("="*10, "SCALAR MULTIPLICATION (%d bits)" % bits, "="*10)
+    print("%-10s %10s %10s %10s %12s" % ("method", "adds", "doubles", "total", "time (ms)"))
+
+    expected = None
+    for method in MUL_METHODS:
+        counts = {"add": 0, "double": 0}
+        start = time.time()
+
+        results = [mul(keys.G, k, method, w, counts) for k in scalars]         # multiply every scalar
+
+        taken = (time.time() - start) * 1000 / trials
+
+        if expected is None:
+            expected = results
+        elif results != expected:                                               # sanity check
+            print("Method %s disagrees with %s" % (method, MUL_METHODS[0]))
+
+        adds = counts["add"] / trials
+        doubles = counts["double"] / trials
+
+        print("%-10s %10.1f %10.1f %10.1f %12.3f" % (method, adds, doubles, adds + doubles, taken))
+
+    table = keys.curve.baseTable(keys.G)
+    if table is not None:
+        print("fixed-base table: width %d, %d points" % (table.w, len(table)))
+
+
+def benchMulti(bits = 32, trials = 100, w = None):
+    """ compares aG + bQ computed as two separate multiplications against
+        a single interleaved multi-scalar multiplication """
+
+    keys = getKeys(bits)
+    order = keys.curve.ord
+    scalars = [(secrets.randbelow(order), secrets.randbelow(order)) for _ in range(trials)]
+
+    print("="*10, "MULTI-SCALAR MULTIPLICATION (%d bits)" % bits, "="*10)
+    print("%-10s %10s %10s %10s %12s" % ("method", "adds", "doubles", "total", "time (ms)"))
+
+    for useTable in [False, True]:
+        keys.curve.setCombWidth(4 if useTable else 0)                           # with and without G's table
+        name = "(table)" if useTable else "(no table)"
+
+        counts = {"add": 0, "double": 0}
+        start = time.time()
+        separate = [mul(keys.G, a, "wnaf" if not useTable else None, w, counts) +
+                    mul(keys.Q, b, "wnaf", w, counts) for a, b in scalars]
+        taken = (time.time() - start) * 1000 / trials
+        adds, doubles = counts["add"] / trials + 1, counts["double"] / trials  # plus the final addition
+        print("%-10s %10.1f %10.1f %10.1f %12.3f %s" % ("separate", adds, doubles, adds + doubles, taken, name))
+
+        counts = {"add": 0, "double": 0}
+        start = time.time()
+        joint = [mulMulti([keys.G, keys.Q], [a, b], w, counts) for a, b in scalars]
+        taken = (time.time() - start) * 1000 / trials
+        adds, doubles = counts["add"] / trials, counts["double"] / trials
+        print("%-10s %10.1f %10.1f %10.1f %12.3f %s" % ("straus", adds, doubles, adds + doubles, taken, name))
+
+        if separate != joint:                                                   # sanity check
+            print("Straus disagrees with separate multiplications")
+
+
+def benchRho(bits = 32, trials = 20, special = False):
+    """ compares Pollard's rho with and without the negation map, and with
+        automorphisms on special curves, on the same keys, printing the
+        average group operations and time """
+
+    keySets = [getKeys(bits, special) for _ in range(trials)]                   # same keys for every walk
+    walks = [("standard", False, False), ("negation", True, False)]
+
+    if special:
+        walks.append(("automorph", False, True))
+
+    print("="*10, "POLLARD'S RHO WALKS (%d bits)" % bits, "="*10)
+    print("%-10s %12s %12s %10s" % ("walk", "count", "time (s)", "speedup"))
+
+    base = None
+    for name, negation, automorphism in walks:
+        taken, count = 0, 0
+
+        for keys in keySets:
+            solver = pollard_rho.PRSolver(keys.curve, keys.Q, keys.G, False)
+            solver.setNegation(negation)
+            solver.setAutomorphism(automorphism)
+            solver.solve()
+            taken += solver.time
+            count += solver.count
+
+            if solver.k != keys.k:                                              # sanity check
+                print("Wrong key with the %s walk" % name)
+
+        if base is None:
+            base = count
+
+        print("%-10s %12.1f %12.3f %10.2f" % (name, count / trials, taken / trials, base / count))
+
+
+def benchTargets(bits = 32, trials = 16, tableSize = 0):
+    """ solves several keys on the same curve with separate rho walks and
+        with multi-target rho, after precomputing tableSize points if
+        given, printing the total group operations and time """
+
+    keys = getKeys(bits)
+    order = keys.curve.order(keys.G)
+    scalars = [secrets.randbelow(order) for _ in range(trials)]
+    targets = [mul(keys.G, k) for k in scalars]
+
+    print("="*10, "MULTI-TARGET RHO (%d bits, %d keys)" % (bits, trials), "="*10)
+    print("%-10s %12s %12s %10s" % ("method", "count", "time (s)", "speedup"))
+
+    taken, count = 0, 0
+    for k, Q in zip(scalars, targets):
+        solver = pollard_rho.PRSolver(keys.curve, Q, keys.G, False)
+        solver.solve(order)
+        taken += solver.time
+        count += solver.count
+
+        if solver.k != k:                                                       # sanity check
+            print("Wrong key with separate walks")
+
+    base = count
+    print("%-10s %12d %12.3f %10.2f" % ("separate", count, taken, 1))
+
+    solver = multi_rho.MRSolver(keys.curve, None, keys.G, False)
+    solver.setCache(None)                                                       # always a new table
+    solver.setTableSize(tableSize)
+
+    if tableSize:
+        start = time.time()
+        table = solver.precompute(order)
+        print("precomputed %d points in %d steps, %.3f s" % (len(table), table.steps, time.time() - start))
+
+    start = time.time()
+    found = solver.solveAll(targets, order)
+    taken = time.time() - start
+
+    if found != scalars:                                                        # sanity check
+        print("Wrong key with multi-target rho")
+
+    print("%-10s %12d %12.3f %10.2f" % ("multi", solver.count, taken, base / solver.count))
+
+
+def benchInterval(bits = 32, trials = 20, width = 0):
+    """ compares the kangaroo and Gaudry-Schost (with and without the
+        negation map) on the same keys, searching an interval of 2^width
+        around each key, or the upper half of the order if width is 0,
+        printing the average group operations over sqrt(N) and time """
+
+    keySets = [getKeys(bits) for _ in range(trials)]                            # same keys for every solver
+    intervals = []
+
+    for keys in keySets:
+        if width:
+            lo = keys.k - secrets.randbelow(1 << width)                         # key somewhere in [lo, hi]
+            intervals.append((lo, lo + (1 << width) - 1))
+        else:
+            order = keys.curve.order(keys.G)
+            intervals.append((order // 2, order - 1))
+
+    print("="*10, "INTERVAL SOLVERS (%d bits)" % bits, "="*10)
+    print("%-10s %12s %12s %12s" % ("solver", "count", "sqrt(N)s", "time (s)"))
+
+    for name in ["lambda", "gs", "gs-neg"]:
+        taken, count, scaled = 0, 0, 0
+
+        for keys, (lo, hi) in zip(keySets, intervals):
+            if name == "lambda":
+                solver = pollard_lambda.PLSolver(keys.curve, keys.Q, keys.G, False)
+            else:
+                solver = gaudry_schost.GSSolver(keys.curve, keys.Q, keys.G, False)
+                solver.setNegation(name == "gs-neg")
+
+            solver.solve(lo, hi)
+            taken += solver.time
+            count += solver.count
+            scaled += solver.count / (hi - lo + 1) ** 0.5
+
+            if solver.k != keys.k:                                              # sanity check
+                print("Wrong key with %s" % name)
+
+        print("%-10s %12.1f %12.2f %12.3f" % (name, count / trials, scaled / trials, taken / trials))
+
+
+def checkSmallIntervals(bits = 32, trials = 5):
+    """ checks the interval solvers on intervals of width 1 to 3 with the
+        key at and away from the centre, where the tame and wild sets
+        hold little more than infinity, printing any wrong key """
+
+    wrong, total = 0, 0
+
+    print("="*10, "SMALL INTERVALS (%d bits)" % bits, "="*10)
+
+    for _ in range(trials):
+        keys = getKeys(bits)
+
+        for width in range(1, 4):
+            for offset in range(width):                                         # key at each position
+                lo = keys.k - offset
+                hi = lo + width - 1
+
+                for name in ["lambda", "gs", "gs-neg"]:
+                    if name == "lambda":
+                        solver = pollard_lambda.PLSolver(keys.curve, keys.Q, keys.G, False)
+                    else:
+                        solver = gaudry_schost.GSSolver(keys.curve, keys.Q, keys.G, False)
+                        solver.setNegation(name == "gs-neg")
+
+                    solver.solve(lo, hi)
+                    total += 1
+
+                    if solver.k != keys.k:                                      # sanity check
+                        wrong += 1
+                        print("Wrong key with %s on [k - %d, k + %d]" % (name, offset, hi - keys.k))
+
+    print("%d of %d correct" % (total - wrong, total))
+
+
+def parallelSolver(algo, keys, workers):
+    """ returns a solver for the keys set up to use the given number of workers """
+
+    if algo == "bs":
+        solver = baby_step.BGSolver(keys.curve, keys.Q, keys.G, False)
+        solver.setCache(None)                                                   # always build the table
+    elif algo == "pr":
+        solver = pollard_rho.PRSolver(keys.curve, keys.Q, keys.G, False)
+    elif algo == "pl":
+        solver = pollard_lambda.PLSolver(keys.curve, keys.Q, keys.G, False)
+
+    solver.setWorkers(workers)
+
+    return solver
+
+
+def benchParallel(algo = "bs", bits = 32, trials = 5, maxWorkers = 4):
+    """ solves the same keys with 1, 2, 4, ... workers, printing the average
+        time and the speedup against a single worker """
+
+    keySets = [getKeys(bits) for _ in range(trials)]                            # same keys for every run
+
+    print("="*10, "PARALLEL %s (%d bits)" % (algo.upper(), bits), "="*10)
+    print("%-10s %12s %12s %10s" % ("workers", "time (s)", "count", "speedup"))
+
+    workers, base = 1, None
+    while workers <= maxWorkers:
+        taken, count = 0, 0
+
+        for keys in keySets:
+            solver = parallelSolver(algo, keys, workers)
+            start = time.time()
+            solver.solve()
+            taken += time.time() - start
+            count += solver.count
+
+            if solver.k != keys.k:                                              # sanity check
+                print("Wrong key with %d workers" % workers)
+
+        if base is None:
+            base = taken
+
+        print("%-10d %12.3f %12.1f %10.2f" % (workers, taken / trials, count / trials, base / taken))
+        workers *= 2
+
+
+############ COMMAND LINE INTERFACE #########
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-k", "--bitsize", help="bitlength of curve to benchmark on", type=int, default=32)
+    parser.add_argument("-n", "--trials", help="number of trials to average over", type=int, default=100)
+    parser.add_argument("-w", "--window", help="window width for wnaf and sliding", type=int, default=None)
+    parser.add_argument("-ms", "--multi", help="benchmarks multi-scalar multiplication", action="store_true")
+    parser.add_argument("-r", "--rho", help="benchmarks rho with and without the negation map", action="store_true")
+    parser.add_argument("-j", "--special", help="only uses j = 0 or 1728 curves, which have automorphisms", action="store_true")
+    parser.add_argument("-p", "--parallel", help="benchmarks a parallel solver against workers (bs, pr, pl)", type=str, default=None)
+    parser.add_argument("-mw", "--maxworkers", help="largest number of workers to benchmark", type=int, default=4)
+    parser.add_argument("-iv", "--interval", help="benchmarks lambda against gaudry_schost, on intervals of 2^width if given", type=int, nargs="?", const=0, default=None)
+    parser.add_argument("-si", "--small", help="checks the interval solvers on intervals of width 1 to 3", action="store_true")
+    parser.add_argument("-mk", "--multikey", help="benchmarks multi-target rho on n keys of one curve", action="store_true")
+    parser.add_argument("-ts", "--tablesize", help="distinguished points multi-target rho precomputes", type=int, default=0)
+
+    args = parser.parse_args()
+
+    if args.interval is not None:
+        benchInterval(args.bitsize, args.trials, args.interval)
+    elif args.small:
+        checkSmallIntervals(args.bitsize, args.trials)
+    elif args.multikey:
+        benchTargets(args.bitsize, args.trials, args.tablesize)
+    elif args.parallel:
+        benchParallel(args.parallel, args.bitsize, args.trials, args.maxworkers)
+    elif args.rho:
+        benchRho(args.bitsize, args.trials, args.special)
+    elif args.multi:
+        benchMulti(args.bitsize, args.trials, args.window)
+    else:
+        benchMul(args.bitsize, args.trials, args.window, args.special)
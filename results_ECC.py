@@ -25,9 +25,11 @@ except ImportError:
 
 import argparse
 import math
+import os
 import threading
 import matplotlib.pyplot as plt                                                 # for drawing graphs
 from ECC import *
+from ECC import curves
 from utils.plots import *
 
 
@@ -70,15 +72,66 @@ def saveResults(saveFile):
             file.write(out)                                                     # write to file
 
 
-def getResults(solver, minBit, maxBit, saveFile, noResults):
-    """ saves a results csv, given a solver, result index and bit range """
+def saveKeys(keys):
+    """ the numbers that define a problem, as a Pari curve can't be pickled """
+
+    return (keys.curve.a, keys.curve.b, keys.curve.fp, keys.G.x, keys.G.y,
+            keys.Q.x, keys.Q.y, keys.k)
+
+
+def loadKeys(bit, saved):
+    """ rebuilds the keys saved by saveKeys, with a new Pari curve """
+
+    a, b, fp, Gx, Gy, Qx, Qy, k = saved
+    C = curves.Curve(a, b, fp)
+
+    keys = generate_ECC.KeyGen(bit, False)                                      # initialise keys
+    keys.setCurve(C)
+    keys.setP(fp)
+    keys.setG(curves.Point(Gx, Gy, C))
+    keys.setQ(curves.Point(Qx, Qy, C))
+    keys.k = k
+
+    return keys
+
+
+def getResults(solver, minBit, maxBit, saveFile, noResults, checkpointDir = None, resume = False,
+               interval = 60):
+    """ saves a results csv, given a solver, result index and bit range,
+        if checkpointing the key being solved and the results so far are
+        saved too, at the start of each bit size and then at most once
+        every interval seconds, so a stopped run resumes on that key """
+
+    progress = None
+    state = None
+    if checkpointDir is not None:
+        progress = checkpoint.Checkpoint(os.path.join(checkpointDir, "results_%s.pkl" % os.path.basename(saveFile)),
+                                         interval)
+        state = progress.load() if resume else None
+
+    if state is not None:                                                       # restore results so far
+        for saved, res in zip(state["results"], [resCount_C, resTime_C, resSpace_C,
+                                                 resCount_W, resTime_W, resSpace_W]):
+            res.update(saved)
 
     for bit in range(minBit, maxBit + 1):
         for i in range(noResults):
 
-            keys = generate_ECC.KeyGen(bit, False)                              # initialise keys
-            keys.generateCurve()                                                # get curve paramaters
-            keys.generateKeys()                                                 # generate keys
+            if state is not None and (bit, i) < (state["bit"], state["i"]):     # already done
+                continue
+
+            if state is not None:                                               # the key being solved
+                keys = loadKeys(bit, state["keys"])
+                state = None
+            else:
+                keys = generate_ECC.KeyGen(bit, False)                          # initialise keys
+                keys.generateCurve()                                            # get curve paramaters
+                keys.generateKeys()                                             # generate keys
+
+            if progress is not None and (i == 0 or progress.due()):
+                progress.save({"bit": bit, "i": i, "keys": saveKeys(keys),
+                               "results": [resCount_C, resTime_C, resSpace_C,
+                                           resCount_W, resTime_W, resSpace_W]})
 
             solver.setCurve(keys.curve)                                         # setup solver
             solver.setQ(keys.Q)
@@ -118,8 +171,14 @@ def getResults(solver, minBit, maxBit, saveFile, noResults):
             if i % 10 == 0:
                 saveResults(saveFile)                                           # every ten results save again
 
+    if progress is not None:
+        progress.clear()                                                        # every result taken
+
 
-def results(algo = 0, minBit = 10, maxBit = 18, saveFile = "results", noResults = 100):
+def results(algo = 0, minBit = 10, maxBit = 18, saveFile = "results", noResults = 100,
+            compact = False, maxTable = 0, tableDir = None, workers = 1, dpBits = None,
+            negation = False, automorphism = False, walks = 1,
+            checkpointDir = None, interval = 60, resume = False, tableSize = 0, tableCache = False):
     """ generates results for a given algorithm """
 
     solver = None
@@ -127,16 +186,51 @@ def results(algo = 0, minBit = 10, maxBit = 18, saveFile = "results", noResults
         solver = brute_force.BFSolver(v = False)
     elif algo == 1:
         solver = baby_step.BGSolver(v = False)
+        solver.setCompact(compact)                                              # memory options for BSGS
+        solver.setMaxTableEntries(maxTable)
+        solver.setOutOfCore(tableDir)
+        solver.setWorkers(workers)
+        solver.setLanes(walks)
+
+        if tableCache and workers == 1:
+            solver.setCache(tables.bsgsCache)                                   # reuse baby steps between keys
     elif algo == 2:
         solver = pollard_rho.PRSolver(v = False)
+        solver.setWorkers(workers)                                              # parallel rho options
+        solver.setDistinguishedBits(dpBits)
+        solver.setNegation(negation)
+        solver.setAutomorphism(automorphism)
+        solver.setWalks(walks)
     elif algo == 3:
         solver = pollard_lambda.PLSolver(v = False)
+        solver.setDistinguishedBits(dpBits)                                     # parallel kangaroo options
+        solver.setWorkers(workers)
+        solver.setKangaroos(walks)
     elif algo == 4:
         solver = pohlig_hellman.PHSolver(v = False)
+        solver.setOutOfCore(tableDir)
     elif algo == 5:
         solver = mov_attack.MOVSolver(v = False)
-
-    getResults(solver, minBit, maxBit, saveFile, noResults)
+    elif algo == 6:
+        solver = interleaved_step.ISSolver(v = False)
+    elif algo == 7:
+        solver = table_lookup.TLSolver(v = False)
+    elif algo == 8:
+        solver = multi_rho.MRSolver(v = False)
+        solver.setDistinguishedBits(dpBits)                                     # multi-target rho options
+        solver.setNegation(negation)
+        solver.setAutomorphism(automorphism)
+        solver.setWalks(walks)
+        solver.setTableSize(tableSize)
+    elif algo == 9:
+        solver = gaudry_schost.GSSolver(v = False)
+        solver.setDistinguishedBits(dpBits)                                     # gaudry-schost options
+        solver.setWalks(max(walks, 16))
+
+    solver.setCheckpoint(checkpointDir, interval)                              # save long runs
+    solver.setResume(resume)
+
+    getResults(solver, minBit, maxBit, saveFile, noResults, checkpointDir, resume, interval)
 
 
 ############ COMMAND LINE INTERFACE #########
@@ -154,6 +248,23 @@ if __name__ == '__main__':
     parser.add_argument("-pl", "--pollard_lambda", help="turns pollard_lambda decryption on", action="store_true")
     parser.add_argument("-ph", "--pohlig_hellman", help="turns pohlig_hellman decryption on", action="store_true")
     parser.add_argument("-ma", "--mov_attack", help="turns mov_attack decryption on", action="store_true")
+    parser.add_argument("-is", "--interleaved_step", help="turns interleaved baby_step-giant_step decryption on", action="store_true")
+    parser.add_argument("-lt", "--table_lookup", help="turns complete table lookup decryption on (fields under 2^24)", action="store_true")
+    parser.add_argument("-mr", "--multi_rho", help="turns multi-target pollard_rho decryption on", action="store_true")
+    parser.add_argument("-gs", "--gaudry_schost", help="turns gaudry_schost decryption on", action="store_true")
+    parser.add_argument("-c", "--compact", help="stores BSGS baby steps in a compact table", action="store_true")
+    parser.add_argument("-mt", "--maxtable", help="maximum number of BSGS baby steps to store", type=int, default=0)
+    parser.add_argument("-od", "--outofcore", help="directory to keep BSGS tables on disk in", type=str, default=None)
+    parser.add_argument("-w", "--workers", help="number of processes for parallel solvers", type=int, default=1)
+    parser.add_argument("-dp", "--distinguished", help="zero bits of a distinguished point for parallel rho and kangaroo traps", type=int, default=None)
+    parser.add_argument("-nm", "--negation", help="uses the negation map in rho", action="store_true")
+    parser.add_argument("-au", "--automorphism", help="uses automorphisms of j = 0 or 1728 curves in rho", action="store_true")
+    parser.add_argument("-wp", "--walks", help="rho walks, kangaroos or BSGS lanes advanced together in each process", type=int, default=1)
+    parser.add_argument("-tc", "--tablecache", help="directory to persist reusable BSGS, lookup and rho tables in", type=str, default=None)
+    parser.add_argument("-ts", "--tablesize", help="distinguished points to precompute for multi-target rho", type=int, default=0)
+    parser.add_argument("-cp", "--checkpoint", help="directory to checkpoint rho, lambda and the results in", type=str, default=None)
+    parser.add_argument("-ci", "--interval", help="seconds between checkpoints", type=float, default=60)
+    parser.add_argument("-re", "--resume", help="resumes from the checkpoint directory", action="store_true")
 
     args = parser.parse_args()
 
@@ -168,5 +279,20 @@ if __name__ == '__main__':
         algo = 4
     elif args.mov_attack:
         algo = 5
-
-    results(algo, args.minbit, args.maxbit, args.savefile, args.noresults)
+    elif args.interleaved_step:
+        algo = 6
+    elif args.table_lookup:
+        algo = 7
+    elif args.multi_rho:
+        algo = 8
+    elif args.gaudry_schost:
+        algo = 9
+
+    tables.bsgsCache.setDirectory(args.tablecache)                             # reuse tables between runs
+    tables.logCache.setDirectory(args.tablecache)
+    tables.dpCache.setDirectory(args.tablecache)
+
+    results(algo, args.minbit, args.maxbit, args.savefile, args.noresults, args.compact, args.maxtable,
+            args.outofcore, args.workers, args.distinguished,
+            args.negation, args.automorphism, args.walks,
+            args.checkpoint, args.interval, args.resume, args.tablesize, args.tablecache is not None)
@@ -48,7 +48,8 @@ def runSolver(keys, solver, name, verbose):
 ############ MASTER PROGRAM #########
 
 def run(k = 10, brute = True, babyStep = True, rho = True,
-        lamb = True, poHel = True, movAttack = True, verbose = True):
+        lamb = True, poHel = True, movAttack = True, verbose = True, interleaved = False,
+        lookup = False, schost = False):
     """ creates a k-bit ECC key, cracks it with several algorithms, and generates
         statistics to compare their performance """
 
@@ -78,6 +79,12 @@ def run(k = 10, brute = True, babyStep = True, rho = True,
         bg = baby_step.BGSolver(keys.curve, keys.Q, keys.G, verbose)            # create new instance with public key info
         bsgs_res = runSolver(keys, bg, "BABYSTEP_GIANTSTEP", verbose)           # check solver
 
+    ############ INTERLEAVED BABYSTEP-GIANTSTEP ATTACK #########
+    is_res = {}
+    if interleaved:
+        isSol = interleaved_step.ISSolver(keys.curve, keys.Q, keys.G, verbose)  # create new instance with public key info
+        is_res = runSolver(keys, isSol, "INTERLEAVED BABYSTEP_GIANTSTEP", verbose)  # check solver
+
     ############ POLLARD'S RHO ATTACK #########
     rho_res = {}
     if rho:
@@ -90,6 +97,12 @@ def run(k = 10, brute = True, babyStep = True, rho = True,
         lambSol = pollard_lambda.PLSolver(keys.curve, keys.Q, keys.G, verbose)  # create new instance with public key info
         lambda_res = runSolver(keys, lambSol, "POLLARD'S LAMBDA", verbose)      # check solver
 
+    ############ GAUDRY-SCHOST ATTACK #########
+    gs_res = {}
+    if schost:
+        gsSol = gaudry_schost.GSSolver(keys.curve, keys.Q, keys.G, verbose)    # create new instance with public key info
+        gs_res = runSolver(keys, gsSol, "GAUDRY-SCHOST", verbose)               # check solver
+
     ############ POHLIG HELLMAN ATTACK #########
     poh_res = {}
     if poHel:
@@ -102,7 +115,13 @@ def run(k = 10, brute = True, babyStep = True, rho = True,
         movSol = mov_attack.MOVSolver(keys.curve, keys.Q, keys.G, verbose)      # create new instance with public key info
         mov_res = runSolver(keys, movSol, "MOV ATTACK", verbose)                # check solver
 
-    return bf_res, bsgs_res, rho_res, lambda_res, poh_res, mov_res
+    ############ TABLE LOOKUP ATTACK #########
+    lt_res = {}
+    if lookup:
+        ltSol = table_lookup.TLSolver(keys.curve, keys.Q, keys.G, verbose)      # create new instance with public key info
+        lt_res = runSolver(keys, ltSol, "TABLE LOOKUP", verbose)                # check solver
+
+    return bf_res, bsgs_res, rho_res, lambda_res, poh_res, mov_res, is_res, lt_res, gs_res
 
 
 def test(k = 10):
@@ -113,7 +132,7 @@ def test(k = 10):
 
     # loop till success
     while not res['res']:
-        res = run(k, False, False, False, False, False, True, verbose = True)[-1]
+        res = run(k, False, False, False, False, False, True, verbose = True)[5]
 
 
 ############ COMMAND LINE INTERFACE #########
@@ -129,6 +148,9 @@ if __name__ == '__main__':
     parser.add_argument("-pl", "--pollard_lambda", help="turns pollard_lambda decryption on", action="store_true")
     parser.add_argument("-ph", "--pohlig_hellman", help="turns pohlig_hellman decryption on", action="store_true")
     parser.add_argument("-ma", "--mov_attack", help="turns mov_attack decryption on", action="store_true")
+    parser.add_argument("-is", "--interleaved_step", help="turns interleaved baby_step-giant_step decryption on", action="store_true")
+    parser.add_argument("-lt", "--table_lookup", help="turns complete table lookup decryption on (fields under 2^24)", action="store_true")
+    parser.add_argument("-gs", "--gaudry_schost", help="turns gaudry_schost decryption on", action="store_true")
     parser.add_argument("-a", "--all", help="turns all on", action="store_true")
     parser.add_argument("-t", "--test", help="runs failure test", action="store_true")
 
@@ -141,6 +163,8 @@ if __name__ == '__main__':
         # default run
         run()
     elif args.all:
-        run(args.bitsize, True, True, True, True, True, True, not args.verbose)
+        run(args.bitsize, True, True, True, True, True, True, not args.verbose, True,
+            args.bitsize <= 24, True)
     else:
-        run(args.bitsize, args.bruteforce, args.baby_step, args.pollard_rho, args.pollard_lambda, args.pohlig_hellman, args.mov_attack, not args.verbose)
+        run(args.bitsize, args.bruteforce, args.baby_step, args.pollard_rho, args.pollard_lambda, args.pohlig_hellman, args.mov_attack, not args.verbose,
+            args.interleaved_step, args.table_lookup, args.gaudry_schost)
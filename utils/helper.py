@@ -57,3 +57,27 @@ def modInverse(p, q) :
 
     # make x mod q to ensure it is postive
     return x % qOrig
+
+
+def batchModInverse(values, q):
+    """ returns the modular inverses of a list of values using Montgomery's
+        trick, one modular inverse plus 3(m-1) multiplications for m values """
+
+    if not values:
+        return []
+
+    prefix = [0] * len(values)                  # running products
+    acc = 1
+
+    for i, v in enumerate(values):
+        prefix[i] = acc
+        acc = (acc * v) % q
+
+    accInv = modInverse(acc, q)                 # the only inverse needed
+    inverses = [0] * len(values)
+
+    for i in range(len(values) - 1, -1, -1):    # peel off one value at a time
+        inverses[i] = (accInv * prefix[i]) % q
+        accInv = (accInv * values[i]) % q
+
+    return inverses